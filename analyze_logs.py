@@ -0,0 +1,351 @@
+import argparse
+import gzip
+import importlib.util
+import json
+import math
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from logs import parse_event
+
+# Formato de telemetría del plugin. Se carga el módulo suelto (solo usa la
+# biblioteca estándar) para no importar el paquete, que necesita CBPi.
+_spec = importlib.util.spec_from_file_location("_chiller_telemetry", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "cbpi4_GlycolChillerWithDependantTargetTemperature", "telemetry.py"))
+telemetry = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(telemetry)
+
+# Marca de tiempo al principio de una línea de texto:
+# journalctl -o short-iso ("2025-10-09T08:53:20+0200 ...") o logging de CBPi ("2025-10-09 08:53:20,123 ...")
+# El desplazamiento horario de short-iso se respeta; sin él, la hora es local
+TEXT_TIMESTAMP = re.compile(rb"^(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:[.,]\d+)?(?:(Z)|([+-])(\d{2}):?(\d{2}))?")
+
+# Huecos mayores que esto (s) entre ticks no cuentan para el tiempo en banda
+MAX_TICK_GAP = 120
+
+# Actores a los que se aplican los mínimos de ciclo corto: compresores de los logs
+# (COMPRESSOR1, COMP2, COMP3...) y etapas de la telemetría, no el actuador PWM
+SHORT_CYCLE_ACTORS = r"^(COMP|STAGE)"
+
+
+class ActorStats:
+    """Arranques, tiempo encendido y ciclos cortos de un actor, en memoria constante."""
+
+    def __init__(self, min_on=0, min_off=0):
+        self.min_on_limit = min_on
+        self.min_off_limit = min_off
+        self.starts = 0
+        self.on_seconds = 0.0
+        self.min_on = None
+        self.min_off = None
+        self.short_on = 0
+        self.short_off = 0
+        self.reasons = {}
+        self.is_on = None
+        self.changed = None
+
+    def transition(self, timestamp, on, reason):
+        if on == self.is_on:
+            return
+        if on:
+            self.starts += 1
+            if self.changed is not None and self.is_on is False:
+                off = timestamp - self.changed
+                self.min_off = off if self.min_off is None else min(self.min_off, off)
+                self.short_off += off < self.min_off_limit
+        elif self.changed is not None and self.is_on:
+            on_time = timestamp - self.changed
+            self.on_seconds += on_time
+            self.min_on = on_time if self.min_on is None else min(self.min_on, on_time)
+            self.short_on += on_time < self.min_on_limit
+        key = f"{'ENCENDIDO' if on else 'APAGADO'} por {reason}" if reason else ("ENCENDIDO" if on else "APAGADO")
+        self.reasons[key] = self.reasons.get(key, 0) + 1
+        self.is_on, self.changed = on, timestamp
+
+    def close(self, timestamp):
+        # El tramo encendido en curso al final del fichero cuenta para el duty
+        if self.is_on and self.changed is not None:
+            self.on_seconds += timestamp - self.changed
+            self.changed = timestamp
+
+    def merge(self, other):
+        self.starts += other.starts
+        self.on_seconds += other.on_seconds
+        self.short_on += other.short_on
+        self.short_off += other.short_off
+        for attr in ("min_on", "min_off"):
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v is not None]
+            setattr(self, attr, min(values) if values else None)
+        for key, count in other.reasons.items():
+            self.reasons[key] = self.reasons.get(key, 0) + count
+
+
+class Analysis:
+    """Estadísticas acumuladas en una sola pasada sobre eventos ordenados por tiempo."""
+
+    def __init__(self, band=0.5, min_on=0, min_off=180, short_cycle_actors=SHORT_CYCLE_ACTORS):
+        self.band = band
+        self.min_on = min_on
+        self.min_off = min_off
+        self.short_cycle_actors = re.compile(short_cycle_actors)
+        self.actors = {}
+        self.first = None
+        self.last = None
+        self.lines = 0
+        self.events = 0
+        self.ticked_seconds = 0.0
+        self.band_seconds = 0.0
+        self.last_tick = None
+
+    def feed(self, timestamp, event):
+        self.events += 1
+        if self.first is None:
+            self.first = timestamp
+        self.last = timestamp
+
+        if event["type"] == "transition":
+            actor = self.actors.get(event["actor"])
+            if actor is None:
+                if self.short_cycle_actors.search(event["actor"]):
+                    actor = ActorStats(self.min_on, self.min_off)
+                else:
+                    actor = ActorStats()
+                self.actors[event["actor"]] = actor
+            actor.transition(timestamp, event["state"] == "ENCENDIDO", event.get("reason"))
+        elif event["type"] == "tick":
+            if self.last_tick is not None:
+                previous_time, in_band = self.last_tick
+                gap = timestamp - previous_time
+                if 0 < gap <= MAX_TICK_GAP:
+                    self.ticked_seconds += gap
+                    self.band_seconds += gap if in_band else 0
+            self.last_tick = (timestamp, abs(event["temp"] - event["target"]) <= self.band)
+
+    def close(self):
+        for actor in self.actors.values():
+            actor.close(self.last)
+        return self
+
+    def merge(self, other):
+        self.lines += other.lines
+        self.events += other.events
+        self.ticked_seconds += other.ticked_seconds
+        self.band_seconds += other.band_seconds
+        firsts = [v for v in (self.first, other.first) if v is not None]
+        lasts = [v for v in (self.last, other.last) if v is not None]
+        self.first = min(firsts) if firsts else None
+        self.last = max(lasts) if lasts else None
+        for name, stats in other.actors.items():
+            self.actors.setdefault(name, ActorStats()).merge(stats)
+
+    def as_dict(self):
+        span = (self.last - self.first) if self.first is not None else 0.0
+        hours = span / 3600
+        return {
+            "first": _iso(self.first),
+            "last": _iso(self.last),
+            "hours": hours,
+            "lines": self.lines,
+            "events": self.events,
+            "time_in_band": self.band_seconds / self.ticked_seconds if self.ticked_seconds else None,
+            "actors": {
+                name: {
+                    "starts": stats.starts,
+                    "starts_per_hour": stats.starts / hours if hours else 0.0,
+                    "duty": stats.on_seconds / span if span else 0.0,
+                    "min_on": stats.min_on,
+                    "min_off": stats.min_off,
+                    "short_on": stats.short_on,
+                    "short_off": stats.short_off,
+                    "reasons": dict(sorted(stats.reasons.items(), key=lambda item: -item[1])),
+                }
+                for name, stats in sorted(self.actors.items())
+            },
+        }
+
+    def format(self):
+        data = self.as_dict()
+        lines = [f"Periodo: {data['first']} → {data['last']} ({data['hours']:.1f} h) | "
+                 f"líneas/registros {data['lines']} | eventos {data['events']}"]
+        if data["time_in_band"] is not None:
+            lines.append(f"Glicol en banda (±{self.band} °C): {100 * data['time_in_band']:.1f} %")
+        for name, stats in data["actors"].items():
+            lines.append(
+                f"{name}: arranques {stats['starts']} ({stats['starts_per_hour']:.2f}/h) | "
+                f"duty {100 * stats['duty']:.1f} % | ON mín {_seconds(stats['min_on'])} | "
+                f"OFF mín {_seconds(stats['min_off'])} | ciclos cortos ON {stats['short_on']} / OFF {stats['short_off']}"
+            )
+            for reason, count in stats["reasons"].items():
+                lines.append(f"    {count:>7}  {reason}")
+        return "\n".join(lines)
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds") if timestamp is not None else None
+
+
+def _seconds(value):
+    return f"{value:.0f} s" if value is not None else "-"
+
+
+# LECTURA EN STREAMING
+
+def open_lines(path):
+    """Líneas en bytes; ``mmap`` para ficheros planos y lectura por bloques para ``.gz``."""
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            yield from f
+        return
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from iter(data.readline, b"")
+
+
+def text_timestamp(match):
+    """Instante (s epoch) de una coincidencia de ``TEXT_TIMESTAMP``."""
+    when = datetime.fromisoformat(f"{match.group(1).decode()} {match.group(2).decode()}")
+    if match.group(3):
+        when = when.replace(tzinfo=timezone.utc)
+    elif match.group(4):
+        offset = timedelta(hours=int(match.group(5)), minutes=int(match.group(6)))
+        when = when.replace(tzinfo=timezone(offset if match.group(4) == b"+" else -offset))
+    return when.timestamp()
+
+
+def log_events(lines):
+    """(instante, evento) de cada línea reconocible: JSON de journalctl/logs.py o texto con fecha."""
+    for raw in lines:
+        timestamp, message = None, None
+        if raw.startswith(b"{"):
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            message = record.get("MESSAGE", record.get("message"))
+            if isinstance(message, list):
+                message = bytes(message).decode("utf-8", "replace")
+            if "__REALTIME_TIMESTAMP" in record:
+                timestamp = int(record["__REALTIME_TIMESTAMP"]) / 1e6
+            elif "time" in record:
+                timestamp = datetime.fromisoformat(record["time"]).timestamp()
+        else:
+            match = TEXT_TIMESTAMP.match(raw)
+            if match and b"] " in raw:
+                timestamp = text_timestamp(match)
+                message = raw.decode("utf-8", "replace").rstrip()
+        if timestamp is None or not isinstance(message, str):
+            continue
+        event = parse_event(message)
+        if event["type"] in ("transition", "tick"):
+            yield timestamp, event
+
+
+def telemetry_events(path):
+    """Eventos equivalentes a partir de un anillo de telemetría (.bin) del plugin."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version, record_size, capacity, head, count = telemetry.HEADER.unpack_from(data, 0)
+        if magic != telemetry.MAGIC or record_size != telemetry.RECORD.size:
+            raise ValueError(f"{path}: no es un fichero de telemetría del plugin")
+        previous = 0
+        oldest = (head - count) % capacity
+        yield None, count
+        for i in range(count):
+            timestamp, chiller_temp, chiller_target, _, bits = telemetry.RECORD.unpack_from(
+                data, telemetry.HEADER_SIZE + ((oldest + i) % capacity) * telemetry.RECORD.size)
+            if not math.isnan(chiller_temp):  # telemetry.NO_READING con el sensor en fallo
+                yield timestamp, {"type": "tick", "temp": chiller_temp, "target": chiller_target}
+            # En el primer registro solo se conocen los encendidos
+            changed = bits ^ previous
+            while changed:
+                low = changed & -changed
+                bit = low.bit_length() - 1
+                name = "ACTUATOR" if bit == telemetry.ACTUATOR_BIT else f"STAGE{bit + 1}"
+                yield timestamp, {"type": "transition", "actor": name,
+                                  "state": "ENCENDIDO" if bits & low else "APAGADO"}
+                changed ^= low
+            previous = bits
+
+
+def _counted(lines, analysis):
+    for line in lines:
+        analysis.lines += 1
+        yield line
+
+
+def is_telemetry(path):
+    with open(path, "rb") as f:
+        return f.read(len(telemetry.MAGIC)) == telemetry.MAGIC
+
+
+def analyze_file(path, band=0.5, min_on=0, min_off=180, short_cycle_actors=SHORT_CYCLE_ACTORS):
+    analysis = Analysis(band, min_on, min_off, short_cycle_actors)
+    if is_telemetry(path):
+        events = telemetry_events(path)
+        # El primer elemento es el número de registros del anillo
+        analysis.lines = next(events)[1]
+    else:
+        events = log_events(_counted(open_lines(path), analysis))
+    for timestamp, event in events:
+        analysis.feed(timestamp, event)
+    return analysis.close()
+
+
+def analyze(paths, band=0.5, min_on=0, min_off=180, jobs=1, short_cycle_actors=SHORT_CYCLE_ACTORS):
+    """Analiza cada fichero por separado (en paralelo con ``jobs`` > 1) y suma los resultados.
+
+    El estado de los actores no pasa de un fichero al siguiente: un ciclo
+    partido entre dos ficheros no cuenta para los mínimos ON/OFF.
+    """
+    total = Analysis(band, min_on, min_off, short_cycle_actors)
+    args = [(path, band, min_on, min_off, short_cycle_actors) for path in paths]
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(analyze_file, *zip(*args))
+            for result in results:
+                total.merge(result)
+    else:
+        for arg in args:
+            total.merge(analyze_file(*arg))
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Estadísticas de compresores a partir de logs exportados (journalctl -o json/short-iso) o telemetría")
+    parser.add_argument("files", nargs="+", help="Ficheros de log (.gz admitido) o de telemetría (.bin)")
+    parser.add_argument("--band", type=float, default=0.5, help="Banda alrededor del objetivo del glicol (°C)")
+    parser.add_argument("--min-on", type=float, default=0, help="Mínimo ON (min) para no contar ciclo corto")
+    parser.add_argument("--min-off", type=float, default=3, help="Mínimo OFF (min) para no contar ciclo corto")
+    parser.add_argument("--short-cycle-actors", default=SHORT_CYCLE_ACTORS, metavar="REGEX",
+                        help="Actores a los que se aplican --min-on/--min-off (por defecto, los compresores)")
+    parser.add_argument("--jobs", type=int, default=1, help="Procesos en paralelo (uno por fichero)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.files if not os.path.exists(path)]
+    if missing:
+        print(f"❌ Error: no existe {', '.join(missing)}")
+        return 1
+
+    try:
+        re.compile(args.short_cycle_actors)
+    except re.error as e:
+        print(f"❌ Error: expresión regular inválida: {e}")
+        return 1
+
+    analysis = analyze(args.files, args.band, args.min_on * 60, args.min_off * 60, args.jobs, args.short_cycle_actors)
+    if args.json:
+        print(json.dumps(analysis.as_dict(), indent=2, ensure_ascii=False))
+    else:
+        print(analysis.format())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,32 @@
 import asyncio
 import logging
 from cbpi.api import *
-from datetime import datetime, timedelta
+from datetime import timedelta
 import pkg_resources
 
-LOG_ACTIVO = False  # Cambia a True para habilitar logs
+from .actors import ActorCommandCache
+from .clock import SystemClock
+from .config import SIGNAL_SOURCES, ChillerConfig, props_fingerprint
+from .coordinator import get_coordinator
+from .endpoints import GlycolChillerEndpoints
+from .inputs import InputWatcher
+from .loglevel import LOG_LEVELS, set_log_level
+from .metrics import REGISTRY, ControlMetrics
+from .pid import TARGET_MODES, PidController
+from .precool import CoolingRateEstimator, Precooler
+from .pwm import DUTY_CURVES, PwmScheduler
+from .sensors import FAIL_SAFE_MODES
+from .signals import create_signal_source
+from .staging import CompressorStage, StagingEngine
+from .state import StateStore, default_file_path
+from .targets import AGGREGATION_POLICIES
+from .telemetry import NO_READING, SAMPLE_INTERVAL, TELEMETRY, TelemetryRing, state_bits
+
+LOG_ACTIVO = False  # Nivel inicial; se cambia en caliente con LogLevel o /glycolchiller/loglevel
 
 logger = logging.getLogger(__name__)
 
-if LOG_ACTIVO:
-    logger.setLevel(logging.DEBUG)
-else:
-    logger.setLevel(logging.CRITICAL + 1)  # No emite ningún log
+set_log_level("Debug" if LOG_ACTIVO else "Off")
 
 if not logger.hasHandlers():
     handler = logging.StreamHandler()
@@ -23,9 +38,9 @@ if not logger.hasHandlers():
 
 try:
     version = pkg_resources.get_distribution("cbpi4_GlycolChillerWithDependantTargetTemperature").version
-    logger.info(f"[PLUGIN] GlycolChiller plugin cargado – versión {version}")
+    logger.info("[PLUGIN] GlycolChiller plugin cargado – versión %s", version)
 except Exception as e:
-    logger.warning(f"[PLUGIN] No se pudo obtener la versión del plugin: {e}")
+    logger.warning("[PLUGIN] No se pudo obtener la versión del plugin: %s", e)
 
 @parameters([
     Property.Number(label="ChillerOffsetOn", configurable=True, description="Offset al encender el compresor"),
@@ -35,6 +50,8 @@ except Exception as e:
     Property.Actor(label="SecondaryCompressor", description="Compresor secundario"),
     Property.Actor(label="ActionActuator", description="Actuador para bomba/válvula"),
     Property.Fermenter(label="DependantFermenter", description="Fermentador dependiente"),
+    Property.Text(label="DependantFermenters", configurable=True, description="Fermentadores dependientes adicionales: ids separados por comas, con peso opcional (id:peso)"),
+    Property.Select(label="TargetAggregation", options=AGGREGATION_POLICIES, description="Cómo combinar los objetivos de varios fermentadores (por defecto Min)"),
     Property.Number(label="MinTempFermenter", configurable=True),
     Property.Number(label="MaxTempFermenter", configurable=True),
     Property.Number(label="MinTempChillerRange", configurable=True),
@@ -44,251 +61,493 @@ except Exception as e:
     Property.Number(label="MinTempCompressor2Range", configurable=True),
     Property.Number(label="MaxTempCompressor2Range", configurable=True),
     Property.Number(label="Compressor2TimeOff", configurable=True),
-    Property.Number(label="Compressor2TimeOn", configurable=True)
+    Property.Number(label="Compressor2TimeOn", configurable=True),
+    Property.Number(label="Compressor1TimeOff", configurable=True, description="Minutos mínimos apagado del compresor 1 antes de rearrancar (por defecto 3)"),
+    Property.Text(label="ExtraCompressors", configurable=True, description="Compresores adicionales separados por ';': 'actor min=-10 max=5 on=0 off=3 run=0' (°C y minutos)"),
+    Property.Number(label="StagePulldownRate", configurable=True, description="°C/min por debajo de los que se añade otra etapa (0 = arrancan todas a la vez)"),
+    Property.Number(label="StageDelay", configurable=True, description="Minutos entre la adición de etapas (por defecto 5)"),
+    Property.Number(label="WatchdogInterval", configurable=True, description="Segundos entre reevaluaciones forzadas sin cambios de entrada (por defecto 30)"),
+    Property.Number(label="ActorReassertInterval", configurable=True, description="Segundos entre reenvíos del estado deseado de los actores (por defecto 300)"),
+    Property.Number(label="ActorTimeout", configurable=True, description="Timeout en segundos de cada comando a un actor (por defecto 5)"),
+    Property.Number(label="ActorRetries", configurable=True, description="Reintentos de un comando fallido, con backoff exponencial (por defecto 2)"),
+    Property.Select(label="ActionSignalSource", options=SIGNAL_SOURCES, description="Origen de la señal 'action required' (por defecto File)"),
+    Property.Text(label="ActionSignalTarget", configurable=True, description="Ruta del fichero, clave de configuración o topic MQTT de la señal"),
+    Property.Number(label="ActionSignalMaxAge", configurable=True, description="Segundos tras los que la señal se considera caducada (vacío = sin límite)"),
+    Property.Text(label="ExtraActuators", configurable=True, description="Actuadores adicionales con el mismo duty, separados por ';': 'actor cycle=120 min=5' (segundos)"),
+    Property.Number(label="ActuatorCycleSeconds", configurable=True, description="Duración del ciclo PWM del actuador en segundos (por defecto 120)"),
+    Property.Number(label="ActuatorMinSeconds", configurable=True, description="Tiempo mínimo encendido/apagado del actuador en segundos (por defecto 5)"),
+    Property.Number(label="ActuatorDiffRange", configurable=True, description="Diferencia de temperatura a la que el duty llega a cero (por defecto 10)"),
+    Property.Select(label="ActuatorDutyCurve", options=list(DUTY_CURVES), description="Curva del duty del actuador (por defecto Linear)"),
+    Property.Text(label="StateFile", configurable=True, description="Fichero del estado persistido (por defecto en la carpeta de configuración de CBPi)"),
+    Property.Select(label="LogLevel", options=list(LOG_LEVELS), description="Nivel de log del plugin; se aplica en caliente (vacío = no se cambia)"),
+    Property.Text(label="TelemetryFile", configurable=True, description="Fichero de telemetría a 1 Hz (por defecto en la carpeta de configuración de CBPi)"),
+    Property.Number(label="TelemetryDays", configurable=True, description="Días de telemetría que se conservan (por defecto 7; 0 = desactivada)"),
+    Property.Select(label="PrecoolMode", options=["No", "Yes"], description="Adelantar el enfriamiento del glicol al siguiente paso del fermentador (por defecto No)"),
+    Property.Number(label="PrecoolRate", configurable=True, description="Ritmo inicial de enfriamiento del glicol en °C/min; luego se aprende (por defecto 0.05)"),
+    Property.Number(label="PrecoolMargin", configurable=True, description="Minutos antes del cambio de paso en los que el glicol debe estar ya frío (por defecto 15)"),
+    Property.Select(label="TargetMode", options=TARGET_MODES, description="Linear: recta fermentador → chiller; PID: la recta más un PID sobre el error del fermentador (por defecto Linear)"),
+    Property.Number(label="PidKp", configurable=True, description="Ganancia proporcional: °C de glicol por °C de error del fermentador (por defecto 2)"),
+    Property.Number(label="PidKi", configurable=True, description="Ganancia integral en 1/min (por defecto 0.02)"),
+    Property.Number(label="PidKd", configurable=True, description="Ganancia derivativa en min (por defecto 0)"),
+    Property.Number(label="PidDeadband", configurable=True, description="Error del fermentador en °C que el PID ignora (por defecto 0.3)"),
+    Property.Number(label="SensorFilterWindow", configurable=True, description="Lecturas de la mediana de cada sensor (por defecto 5; 1 = sin mediana)"),
+    Property.Number(label="SensorFilterAlpha", configurable=True, description="Factor de la media exponencial tras la mediana (por defecto 0.5; 1 = sin suavizado)"),
+    Property.Number(label="SensorMaxRate", configurable=True, description="Cambio máximo aceptado en °C/min (por defecto 0 = sin límite)"),
+    Property.Number(label="SensorStaleSeconds", configurable=True, description="Segundos sin lecturas para dar el sensor por fallido (por defecto 120; 0 = nunca)"),
+    Property.Number(label="SensorFrozenSeconds", configurable=True, description="Segundos con exactamente el mismo valor para dar el sensor por congelado (por defecto 3600; 0 = nunca)"),
+    Property.Number(label="SensorDeadband", configurable=True, description="Cambio mínimo en °C de la temperatura filtrada del chiller para recalcular (por defecto 0.03, media resolución de un DS18B20)"),
+    Property.Select(label="FailSafeMode", options=FAIL_SAFE_MODES, description="Con el sensor del chiller en fallo: Off apaga los compresores, Duty hace ciclos fijos con el principal (por defecto Off)"),
+    Property.Number(label="FailSafeDuty", configurable=True, description="Porcentaje de tiempo encendido en modo Duty (por defecto 30)"),
+    Property.Number(label="FailSafeCycle", configurable=True, description="Duración en minutos del ciclo del modo Duty (por defecto 30)")
 ])
 class GlycolChillerWithDependantTargetTemperature_v1_0_1(CBPiFermenterLogic):
 
+    # Lectura de entradas en memoria; el control solo se ejecuta si cambian.
+    # Todas las instancias avanzan juntas en el coordinador con este periodo
+    INPUT_POLL_INTERVAL = 0.5
+    # Cada cuánto se comprueba si han cambiado las propiedades en la UI
+    CONFIG_CHECK_INTERVAL = 2
+    # Una muestra de telemetría por segundo; el mapa se vuelca a disco cada 5 minutos
+    TELEMETRY_INTERVAL = SAMPLE_INTERVAL
+    TELEMETRY_FLUSH_INTERVAL = 300
+
     def __init__(self, cbpi, id, props):
         super().__init__(cbpi, id, props)
         self.api = cbpi
-        self.compressor2_has_been_on = False
-        self.compressor2_time = None
-        self.actuator_last_on_time = None
-        self.actuator_last_off_time = None
-        self.compressor1_is_on = False
-        self.compressor2_is_on = False
         self.actuator_state = "off"
-
-    def calculate_chiller_target(self, target):
-        try:
-            slope = (self.max_range_chiller - self.min_range_chiller) / (self.max_temp_fermenter - self.min_temp_fermenter)
-            target_val = slope * (target - self.min_temp_fermenter) + self.min_range_chiller
-            result = max(self.min_range_chiller, min(self.max_range_chiller, target_val))
-            logger.debug(f"[CHILLER] Temp. objetivo calculada: {result:.2f}")
-            return result
-        except Exception as e:
-            logger.exception("[CHILLER] Error en el cálculo de objetivo de temperatura")
-            return self.min_range_chiller
-
-    async def control_compressor(self, compressor, current_temp, target_temp, secondary=False):
+        self.last_control_time = None
+        self.next_deadline = None
+        self.state_store = None
+        self.config = None
+        self.staging = None
+        self.inputs = None
+        self.action_signal = None
+        self.props_fingerprint = None
+        self.props_checked = None
+        self.telemetry = None
+        self.telemetry_sampled = None
+        self.telemetry_flushed = None
+        self.chiller_target_temp = None
+        self.cooling_rate = None
+        self.pid = PidController()
+        self.fail_safe_since = None
+        self.coordinator = None
+        self.stopped = None
+        # Inyectable: la simulación lo sustituye por un reloj virtual
+        self.clock = SystemClock()
+        self.metrics = ControlMetrics(id, self.clock)
+        self.actor_cache = ActorCommandCache(self)
+        self.pwm = PwmScheduler(self._pwm_switch)
+
+    def calculate_chiller_target(self, target, now=None):
+        # Pendiente y ordenada precalculadas y validadas en ChillerConfig
+        result = self.config.chiller_target(target)
+
+        if self.config.target_mode == "PID":
+            error = self.inputs.fermenter_error()
+            if error is not None:
+                # La recta es el feed-forward; el PID corrige con el error real del fermentador
+                correction = self.pid.update(error, now or self.clock.now(),
+                                             result - self.config.max_range_chiller,
+                                             result - self.config.min_range_chiller)
+                logger.debug("[CHILLER] [PID] Error fermentador: %.2f | Corrección: %.2f | Integral: %.2f",
+                             error, correction, self.pid.integral)
+                # Redondeado para no mover el objetivo por ruido del sensor
+                result = round((result - correction) * 10) / 10
+
+        logger.debug("[CHILLER] Temp. objetivo calculada: %.2f", result)
+        return result
+
+    async def control_compressors(self, current_temp, target_temp, now):
         try:
-            now = datetime.now()
-            offset_on = self.chiller_offset_min
-            offset_off = self.chiller_offset_max
-
-            logger.debug(f"[CHILLER] {'[COMPRESSOR2]' if secondary else '[COMPRESSOR1]'} – Temp actual: {current_temp:.2f}°C | Target: {target_temp:.2f}°C | ON offset: {offset_on} | OFF offset: {offset_off}")
+            logger.debug("[CHILLER] [COMPRESSORS] Temp actual: %.2f°C | Target: %.2f°C | ON offset: %s | OFF offset: %s",
+                         current_temp, target_temp, self.staging.offset_on, self.staging.offset_off)
 
-            if secondary:
-                await self._control_compressor2(compressor, current_temp, target_temp, now, offset_on, offset_off)
-            else:
-                await self._control_compressor1(compressor, current_temp, target_temp, now, offset_on, offset_off)
+            changes = self.staging.decide(current_temp, target_temp, now)
+            await self._apply_stage_changes(changes, now)
 
         except Exception:
             logger.exception("[CHILLER] [COMPRESSOR] Error en el control del compresor")
 
-    async def _control_compressor1(self, compressor, current_temp, target_temp, now, offset_on, offset_off):
-        if target_temp > self.compressor1_max_temp:
-            await self.safe_actor_off(compressor)
-            self.compressor1_is_on = False
-            logger.info("[CHILLER] [COMPRESSOR1] APAGADO por rango")
+    async def _apply_stage_changes(self, changes, now):
+        for stage, on, reason in changes:
+            logger.info("[CHILLER] [%s] %s por %s", stage.tag, "ENCENDIDO" if on else "APAGADO", reason)
+            self.metrics.record_switch(stage, on, reason, now)
+        if changes:
+            self.save_state(now)
+
+        # El caché suprime las órdenes que no cambian el estado del actor
+        for stage in self.staging.stages:
+            if stage.is_on:
+                await self.safe_actor_on(stage.actor)
+            else:
+                await self.safe_actor_off(stage.actor)
+
+    def _build_stages(self, config):
+        stages = [
+            CompressorStage(
+                config.compressor1, "COMPRESSOR1",
+                min_target=config.compressor1_min_temp,
+                max_target=config.compressor1_max_temp,
+                min_off=config.compressor1_time_off,
+            ),
+            CompressorStage(
+                config.compressor2, "COMP2",
+                min_target=config.compressor2_min_temp,
+                max_target=config.compressor2_max_temp,
+                min_off=config.compressor2_time_off,
+                max_run=config.compressor2_time_on,
+            ),
+        ]
+        for index, options in enumerate(map(dict, config.extra_compressors), start=3):
+            stages.append(CompressorStage(
+                options["actor"], f"COMP{index}",
+                min_target=options.get("min", float("-inf")),
+                max_target=options.get("max", float("inf")),
+                min_on=options.get("on", 0),
+                min_off=options.get("off", 3),
+                max_run=options.get("run", 0),
+            ))
+        return [stage for stage in stages if stage.actor is not None]
+
+    def _build_actuators(self, config):
+        # El actuador principal conserva la etiqueta histórica ACTUATOR
+        channels = [dict(actor=config.action_actuator, name="ACTUATOR")]
+        channels += [
+            dict(actor=options["actor"], name=f"ACTUATOR:{options['actor']}",
+                 cycle_seconds=options.get("cycle"), min_seconds=options.get("min"))
+            for options in map(dict, config.extra_actuators)
+        ]
+        for channel in channels:
+            if channel.get("cycle_seconds") is None:
+                channel["cycle_seconds"] = config.actuator_cycle_seconds
+            if channel.get("min_seconds") is None:
+                channel["min_seconds"] = config.actuator_min_seconds
+            channel["curve"] = config.actuator_duty_curve
+        return [channel for channel in channels if channel["actor"] is not None]
+
+    async def apply_config(self, config):
+        """Aplica una configuración validada sin reiniciar el bucle."""
+        previous, self.config = self.config, config
+
+        self.compressor1 = config.compressor1
+        self.compressor2 = config.compressor2
+        self.action_actuator = config.action_actuator
+        self.fermenter = config.fermenter
+        self.fermenters = list(config.fermenters)
+
+        if config.log_level and (previous is None or previous.log_level != config.log_level):
+            set_log_level(config.log_level)
+
+        self.watchdog_interval = config.watchdog_interval
+        self.actor_cache.reassert_interval = config.actor_reassert_interval
+        self.actor_cache.timeout = config.actor_timeout
+        self.actor_cache.retries = config.actor_retries
+
+        stages = self._build_stages(config)
+        if self.staging is None:
+            self.staging = StagingEngine(stages, config.offset_on, config.offset_off,
+                                         config.stage_pulldown_rate, config.stage_delay)
+        else:
+            removed = self.staging.reconfigure(stages, config.offset_on, config.offset_off,
+                                               config.stage_pulldown_rate, config.stage_delay)
+            for stage in removed:
+                await self.safe_actor_off(stage.actor)
+                self.metrics.record_switch(stage, False, "reconfiguración", self.clock.now())
+                logger.info("[CHILLER] [%s] APAGADO por reconfiguración", stage.tag)
+
+        sensor_filter = dict(
+            window=config.sensor_filter_window,
+            alpha=config.sensor_filter_alpha,
+            max_rate=config.sensor_max_rate,
+            stale_after=config.sensor_stale_seconds,
+            frozen_after=config.sensor_frozen_seconds,
+        )
+        if self.inputs is None or self.inputs.sensor_filter != sensor_filter or \
+                (previous.fermenters, previous.target_aggregation) != (config.fermenters, config.target_aggregation):
+            self.inputs = InputWatcher(self, self.fermenters, config.target_aggregation, sensor_filter=sensor_filter)
+        # La media exponencial cambia en casi cada lectura; sin banda muerta se recalcularía siempre
+        self.inputs.sensor_deadband = config.sensor_deadband
+        self.inputs.track_temps = config.target_mode == "PID"
+
+        # El ritmo aprendido se conserva al reconfigurar
+        self.pid.configure(config.pid_kp, config.pid_ki, config.pid_kd, config.pid_deadband)
+        if previous is not None and previous.target_mode != config.target_mode:
+            self.pid.reset()
+
+        if self.cooling_rate is None:
+            self.cooling_rate = CoolingRateEstimator(config.precool_rate)
+        self.inputs.precool = Precooler(config, self.cooling_rate, config.precool_margin) if config.precool else None
+
+        signal = (config.action_signal_source, config.action_signal_target, config.action_signal_max_age)
+        if previous is None or (previous.action_signal_source, previous.action_signal_target, previous.action_signal_max_age) != signal:
+            if self.action_signal is not None:
+                await self.action_signal.stop()
+            self.action_signal = create_signal_source(self.cbpi, *signal, self.clock)
+            await self.action_signal.start()
+
+        if previous is None or previous.state_file != config.state_file:
+            self.state_store = StateStore(config.state_file or default_file_path(self.cbpi, f"glycol_chiller_state_{self.id}.json"))
+
+        if previous is None or (previous.telemetry_file, previous.telemetry_days) != (config.telemetry_file, config.telemetry_days):
+            self.open_telemetry(config)
+
+        channels = self._build_actuators(config)
+        for actor in set(self.pwm.channels) - {channel["actor"] for channel in channels}:
+            self.pwm.remove(actor)
+        for channel in channels:
+            self.pwm.add(channel.pop("actor"), **channel)
+
+        # Fuerza un ciclo de control con la nueva configuración
+        self.last_control_time = None
+        self.next_deadline = None
+        self.actor_cache.dispatch()
+
+    async def check_props(self, reader=None):
+        now = self.clock.monotonic()
+        if self.props_checked is not None and now - self.props_checked < self.CONFIG_CHECK_INTERVAL:
             return
+        self.props_checked = now
 
-        if not self.compressor1_is_on:
-            logger.debug("[CHILLER] [COMPRESSOR1] Está apagado. Evaluando condiciones para encender.")
-            if current_temp >= target_temp + offset_on:
-                await self.safe_actor_on(compressor)
-                self.compressor1_is_on = True
-                logger.info("[CHILLER] [COMPRESSOR1] ENCENDIDO por histéresis")
-        else:
-            logger.debug("[CHILLER] [COMPRESSOR1] Está encendido. Evaluando condiciones para apagar.")
-            if current_temp <= target_temp - offset_off:
-                await self.safe_actor_off(compressor)
-                self.compressor1_is_on = False
-                logger.info("[CHILLER] [COMPRESSOR1] APAGADO por histéresis")
-        
-    async def _control_compressor2(self, compressor, current_temp, target_temp, now, offset_on, offset_off):
-        logger.debug("[CHILLER] [COMPRESSOR2] Comprobando condiciones para compresor secundario")
-
-        if not (self.compressor2_min_temp <= target_temp <= self.compressor2_max_temp):
-            await self._turn_off_comp2("rango", compressor, now)
+        fermenter = (reader or self).get_fermenter(self.id)
+        props = getattr(fermenter, "props", None) or self.props
+        fingerprint = props_fingerprint(props)
+        if fingerprint == self.props_fingerprint:
             return
+        self.props_fingerprint = fingerprint
 
-        if not self.compressor2_is_on:
-            await self._try_turn_on_comp2(current_temp, target_temp, offset_on, now, compressor)
-        else:
-            await self._try_turn_off_comp2(current_temp, target_temp, offset_off, now, compressor)
-
-    async def _try_turn_on_comp2(self, current_temp, target_temp, offset_on, now, compressor):
-        logger.debug("[CHILLER] [COMPRESSOR2] Está apagado. Evaluando condiciones para encender.")
-        
-        tiempo_apagado = float('inf') if self.compressor2_time is None else (now - self.compressor2_time).total_seconds() / 60
-        tiempo_maximo = self.compressor2_time_off
-        tiempo_restante = max(0, tiempo_maximo - tiempo_apagado)
-
-        logger.debug(
-            f"----[CHILLER] [COMPRESSOR2] Tiempo apagado: {tiempo_apagado:.1f} min | "
-            f"Tiempo restante: {tiempo_restante:.1f} min"
-        )
+        try:
+            config = ChillerConfig.from_props(props)
+        except ValueError as e:
+            logger.error("[CHILLER] [CONFIG] Propiedades inválidas; se mantiene la configuración anterior: %s", e)
+            return
+        if config == self.config:
+            return
 
-        can_start = (
-            current_temp >= target_temp + offset_on and (
-                not self.compressor2_has_been_on or
-                tiempo_apagado >= tiempo_maximo
-            )
-        )
+        logger.info("[CHILLER] [CONFIG] Propiedades modificadas; aplicando la nueva configuración")
+        self.props = props
+        await self.apply_config(config)
 
-        if can_start:
-            await self._turn_on_comp2(compressor, now)
+    async def control_actuator(self, current_temp, target_temp):
+        try:
+            action_required = await self.action_signal.get()
 
-    async def _try_turn_off_comp2(self, current_temp, target_temp, offset_off, now, compressor):
-        logger.debug("[CHILLER] [COMPRESSOR2] Está encendido. Evaluando condiciones para apagar.")
+            if not action_required:
+                for actor in self.pwm.channels:
+                    self.pwm.set_duty(actor, None)
+                return
 
-        tiempo_encendido = float('inf') if self.compressor2_time is None else (now - self.compressor2_time).total_seconds() / 60
-        tiempo_maximo = self.compressor2_time_on
-        tiempo_restante = max(0, tiempo_maximo - tiempo_encendido)
+            # Duty proporcional: menos tiempo encendido cuanto más caliente está el glicol
+            diff = current_temp - target_temp
+            adjusted_diff = min(max(diff, 0), self.config.actuator_diff_range)
+            duty = 1 - adjusted_diff / self.config.actuator_diff_range
 
-        logger.debug(
-            f"----[CHILLER] [COMPRESSOR2] Tiempo encendido: {tiempo_encendido:.1f} min | "
-            f"Tiempo restante: {tiempo_restante:.1f} min"
-        )
+            logger.debug("[CHILLER] [ACTUATOR] Diff: %.2f | Duty: %.2f", diff, duty)
+            for actor in self.pwm.channels:
+                self.pwm.set_duty(actor, duty)
 
-        if tiempo_encendido >= tiempo_maximo:
-            await self._turn_off_comp2("tiempo máximo", compressor, now)
-        elif current_temp <= target_temp - offset_off:
-            await self._turn_off_comp2("histéresis", compressor, now)
+        except Exception as e:
+            logger.exception("[CHILLER] [ACTUATOR] Error en el control del actuador: %s", e)
 
-    
-    async def _turn_on_comp2(self, compressor, now):
-        await self.safe_actor_on(compressor)
-        self.compressor2_time = now
-        self.compressor2_is_on = True
-        self.compressor2_has_been_on = True
-        logger.info("[CHILLER] [COMP2] ENCENDIDO por histéresis")
+    async def _pwm_switch(self, actor, on):
+        if actor == self.action_actuator:
+            self.actuator_state = "on" if on else "off"
+        if on:
+            await self.safe_actor_on(actor)
+        else:
+            await self.safe_actor_off(actor)
+        await self.actor_cache.flush()
 
-    async def _turn_off_comp2(self, reason, compressor, now):
-        await self.safe_actor_off(compressor)
-        # Solo actualizamos el tiempo si estaba realmente encendido
-        if self.compressor2_is_on:
-            self.compressor2_time = now
-        self.compressor2_is_on = False
-        logger.info(f"[CHILLER] [COMP2] APAGADO por {reason}")
+    async def safe_actor_on(self, actor):
+        # Se envía en el siguiente flush() del caché
+        self.actor_cache.set(actor, True)
 
+    async def safe_actor_off(self, actor):
+        self.actor_cache.set(actor, False)
 
-    async def control_actuator(self, current_temp, target_temp):
+    def save_state(self, now=None):
+        # Solo en transiciones de los compresores; el actuador PWM no se persiste
+        if self.state_store is None:
+            return
+        now = now or self.clock.now()
+        self.state_store.save({
+            "saved": now.isoformat(),
+            "stages": self.staging.snapshot(),
+            "cooling_rate": self.cooling_rate.rate,
+            "pid": self.pid.snapshot(),
+        })
+
+    def restore_state(self):
+        snapshot = self.state_store.load()
+        if snapshot is None:
+            logger.info("[CHILLER] [STATE] Sin estado guardado; arranque en frío")
+            return
+        now = self.clock.now()
+        self.staging.restore(snapshot.get("stages", {}), self.actor_cache.actual_state, now)
+        if snapshot.get("cooling_rate"):
+            self.cooling_rate.rate = snapshot["cooling_rate"]
+        if snapshot.get("pid") and self.config.target_mode == "PID":
+            self.pid.restore(snapshot["pid"])
+        logger.info("[CHILLER] [STATE] Estado guardado el %s restaurado", snapshot.get("saved"))
+
+    def open_telemetry(self, config):
+        self.close_telemetry()
+        if not config.telemetry_days:
+            return
+        path = config.telemetry_file or default_file_path(self.cbpi, f"glycol_chiller_telemetry_{self.id}.bin")
         try:
-            try:
-                with open("/home/cbpi/fermenter_action_required.txt", "r") as f:
-                    value = f.read().strip()
-                    action_required = (value == "1")
-                    logger.debug(f"[CHILLER] [ACTUATOR] Action Required leido: {action_required}")
-            except FileNotFoundError:
-                logger.warning("[CHILLER] [ACTUATOR] Archivo de estado no encontrado.")
-            except Exception:
-                logger.exception("[CHILLER] [ACTUATOR] Error al leer el archivo de estado")
-
-            #----------------- Control temporizado del actuador ------------------
-            if action_required:
-                diff = current_temp - target_temp
-                adjusted_diff = min(max(diff, 0), 10)  # limita entre 0 y 10
-
-                total_cycle_seconds = 120
-                min_time = 5  # mínimo 5 segundos
-
-                # Calcular tiempos proporcionales crudos
-                raw_on = total_cycle_seconds * (1 - adjusted_diff / 10)
-                raw_off = total_cycle_seconds * (adjusted_diff / 10)
+            self.telemetry = TelemetryRing(path, config.telemetry_days * 86400 / self.TELEMETRY_INTERVAL)
+        except (OSError, ValueError):
+            logger.exception("[CHILLER] [TELEMETRY] No se pudo abrir %s; telemetría desactivada", path)
+            return
+        TELEMETRY[self.id] = self.telemetry
 
-                # Aplicar mínimos
-                on_seconds = max(raw_on, min_time)
-                off_seconds = max(raw_off, min_time)
+    def close_telemetry(self):
+        if self.telemetry is None:
+            return
+        TELEMETRY.pop(self.id, None)
+        self.telemetry.close()
+        self.telemetry = None
 
-                # Ajustar si al aplicar mínimos se supera el total del ciclo
-                if on_seconds + off_seconds > total_cycle_seconds:
-                    overflow = (on_seconds + off_seconds) - total_cycle_seconds
-                    # Restar proporcionalmente el exceso
-                    if on_seconds > off_seconds:
-                        on_seconds -= overflow
-                    else:
-                        off_seconds -= overflow
+    def record_telemetry(self, now, chiller_current_temp, fermenter_target_temp):
+        if self.telemetry is None:
+            return
+        monotonic = self.clock.monotonic()
+        if self.telemetry_sampled is not None and monotonic - self.telemetry_sampled < self.TELEMETRY_INTERVAL:
+            return
+        self.telemetry_sampled = monotonic
+
+        chiller_target_temp = self.chiller_target_temp
+        if chiller_target_temp is None:
+            chiller_target_temp = self.config.chiller_target(fermenter_target_temp)
+        if chiller_current_temp is None:
+            chiller_current_temp = NO_READING
+        self.telemetry.append(now.timestamp(), chiller_current_temp, chiller_target_temp, fermenter_target_temp,
+                              state_bits(self.staging.stages, self.actuator_state == "on"))
+
+        if self.telemetry_flushed is None:
+            self.telemetry_flushed = monotonic
+        elif monotonic - self.telemetry_flushed >= self.TELEMETRY_FLUSH_INTERVAL:
+            self.telemetry_flushed = monotonic
+            # msync fuera del bucle; el mapa sigue disponible para escribir
+            asyncio.get_event_loop().run_in_executor(None, self.telemetry.flush)
+
+    def _timer_due(self, now):
+        # Watchdog lento: reevalúa aunque no cambien las entradas
+        if self.last_control_time is None:
+            return True
+        if (now - self.last_control_time).total_seconds() >= self.watchdog_interval:
+            logger.debug("[CHILLER] Watchdog: reevaluando sin cambios de entrada")
+            return True
+
+        # Vencimiento exacto de las reglas temporales de los compresores
+        if self.next_deadline is not None and now >= self.next_deadline:
+            logger.debug("[CHILLER] [STAGING] Vencimiento de regla temporal")
+            return True
+
+        return False
+
+    async def fail_safe_cycle(self, fermenter_target_temp, now):
+        """Control sin el sensor del chiller: compresores apagados o ciclos fijos."""
+        self.last_control_time = now
+        config = self.config
+        if self.fail_safe_since is None:
+            self.fail_safe_since = now
+            logger.error("[CHILLER] [SENSOR] Sensor del chiller en fallo; modo de seguridad %s", config.fail_safe_mode)
+
+        actors = set()
+        self.next_deadline = None
+        if config.fail_safe_mode == "Duty" and self.staging.stages and config.fail_safe_duty > 0:
+            cycle = timedelta(minutes=config.fail_safe_cycle)
+            on_time = cycle * (config.fail_safe_duty / 100)
+            cycle_start = now - (now - self.fail_safe_since) % cycle
+            if now - cycle_start < on_time:
+                actors.add(self.staging.stages[0].actor)
+                self.next_deadline = cycle_start + on_time
+            else:
+                self.next_deadline = cycle_start + cycle
 
-                # Convertir a timedelta
-                on_time = timedelta(seconds=on_seconds)
-                off_time = timedelta(seconds=off_seconds)
+        await self._apply_stage_changes(self.staging.force(actors, now, "fallo de sensor"), now)
+        # Sin temperatura del glicol el actuador funciona a duty completo si se pide frío
+        chiller_target_temp = self.calculate_chiller_target(fermenter_target_temp, now)
+        await self.control_actuator(chiller_target_temp, chiller_target_temp)
 
-                logger.debug(f"[CHILLER] [ACTUATOR] Diff: {diff:.2f} | ON: {on_seconds:.1f} s | OFF: {off_seconds:.1f} s")
+        # El coordinador envía los comandos al final del tick
+        self.actor_cache.reconcile(now, self.inputs.reader)
 
-                now = datetime.now()
-                self.actuator_last_switch_time = now
+    async def control_cycle(self, chiller_current_temp, fermenter_target_temp, now):
+        self.last_control_time = now
+        chiller_target_temp = self.calculate_chiller_target(fermenter_target_temp, now)
+        self.chiller_target_temp = chiller_target_temp
 
-                elapsed = now - self.actuator_last_switch_time
+        logger.debug("[CHILLER] Temp actual del chiller: %.2f°C | Temp objetivo para el chiller: %.2f°C", chiller_current_temp, chiller_target_temp)
+        logger.debug("[CHILLER] Temp objetivo fermentador (agregada): %.2f°C", fermenter_target_temp)
+        self.metrics.observe_target(chiller_current_temp, chiller_target_temp)
 
-                if self.actuator_state == "off" and elapsed >= off_time:
-                    await self.safe_actor_on(self.action_actuator)
-                    self.actuator_state = "on"
-                    self.actuator_last_switch_time = now
-                    logger.info("[CHILLER] [ACTUATOR] ENCENDIDO")
+        # Solo escribimos el objetivo del chiller cuando difiere del actual
+        rounded_target = round(chiller_target_temp, 2)
+        if self.inputs.reader.get_fermenter(self.id).target_temp != rounded_target:
+            await self.set_fermenter_target_temp(self.id, rounded_target)
 
-                elif self.actuator_state == "on" and elapsed >= on_time:
-                    await self.safe_actor_off(self.action_actuator)
-                    self.actuator_state = "off"
-                    self.actuator_last_switch_time = now
-                    logger.info("[CHILLER] [ACTUATOR] APAGADO")
+        await self.control_compressors(chiller_current_temp, chiller_target_temp, now)
+        self.cooling_rate.observe(now, chiller_current_temp, any(stage.is_on for stage in self.staging.stages))
+        self.next_deadline = self.staging.next_deadline(now)
 
+        await self.control_actuator(chiller_current_temp, chiller_target_temp)
 
-        except Exception as e:
-            logger.exception(f"[CHILLER] [ACTUATOR] Error en el control del actuador: {e}")
+        # El coordinador envía los comandos al final del tick
+        self.actor_cache.reconcile(now, self.inputs.reader)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[CHILLER] [ACTOR] Resumen de comandos: %s", self.actor_cache.summary())
 
+    async def tick(self, reader):
+        """Un paso del bucle de control sobre las lecturas compartidas del tick."""
+        try:
+            await self.check_props(reader)
+            start = self.clock.monotonic()
+            changed, chiller_current_temp, fermenter_target_temp = self.inputs.poll(reader)
+            self.metrics.observe_sensor(self.clock.monotonic() - start)
+            now = self.clock.now()
+
+            if self.inputs.sensor_fault:
+                if changed or self._timer_due(now):
+                    await self.fail_safe_cycle(fermenter_target_temp, now)
+            else:
+                if self.fail_safe_since is not None:
+                    logger.warning("[CHILLER] [SENSOR] Sensor del chiller recuperado; fin del modo de seguridad")
+                    self.fail_safe_since = None
+                    self.last_control_time = None
 
-    async def safe_actor_on(self, actor):
-        await self.actor_on(actor)
+                if changed or self._timer_due(now):
+                    start = self.clock.monotonic()
+                    await self.control_cycle(chiller_current_temp, fermenter_target_temp, now)
+                    self.metrics.observe_tick(self.clock.monotonic() - start)
 
-    async def safe_actor_off(self, actor):
-        await self.actor_off(actor)
+            self.record_telemetry(now, chiller_current_temp, fermenter_target_temp)
+        except Exception:
+            logger.exception("[MAIN LOOP] Error en ejecución del ciclo principal")
 
     async def run(self):
         try:
             logger.debug("[CHILLER] Iniciando ejecución del plugin")
 
-            self.compressor1 = self.props.get("MainCompressor")
-            self.compressor2 = self.props.get("SecondaryCompressor")
-            self.action_actuator = self.props.get("ActionActuator")
-            self.fermenter = self.props.get("DependantFermenter")
             self.chiller = self.get_fermenter(self.id)
 
-            self.compressor1_min_temp = float(self.props.get("MinTempCompressor1Range", -10))
-            self.compressor1_max_temp = float(self.props.get("MaxTempCompressor1Range", 20))
-            self.compressor2_min_temp = float(self.props.get("MinTempCompressor2Range", -10))
-            self.compressor2_max_temp = float(self.props.get("MaxTempCompressor2Range", 5))
-
-            self.compressor2_time_off = float(self.props.get("Compressor2TimeOff", 25))
-            self.compressor2_time_on = float(self.props.get("Compressor2TimeOn", 180))
-
-            self.min_temp_fermenter = float(self.props.get("MinTempFermenter", 0))
-            self.max_temp_fermenter = float(self.props.get("MaxTempFermenter", 20))
-            self.min_range_chiller = float(self.props.get("MinTempChillerRange", -6))
-            self.max_range_chiller = float(self.props.get("MaxTempChillerRange", 10))
-            self.chiller_offset_min = float(self.props.get("ChillerOffsetOn", 1))
-            self.chiller_offset_max = float(self.props.get("ChillerOffsetOff", 1))
-
-            while self.running:
-                try:
-                    chiller_current_temp = float(self.get_sensor_value(self.chiller.sensor).get("value"))
-                    fermenter_target_temp = float(self.get_fermenter_target_temp(self.fermenter))
-                    chiller_target_temp = self.calculate_chiller_target(fermenter_target_temp)
-
-                    logger.debug(f"[CHILLER] Temp actual del chiller: {chiller_current_temp:.2f}°C | Temp objetivo para el chiller: {chiller_target_temp:.2f}°C")
-                    logger.debug(f"[CHILLER] Temp objetivo fermentador: {fermenter_target_temp:.2f}°C")
-
-                    await self.set_fermenter_target_temp(self.id, round(chiller_target_temp, 2))
-
-                    await self.control_compressor(self.compressor1, chiller_current_temp, chiller_target_temp, secondary=False)
-                    await self.control_compressor(self.compressor2, chiller_current_temp, chiller_target_temp, secondary=True)
-
-                    await self.control_actuator(chiller_current_temp, chiller_target_temp)
-                except Exception:
-                    logger.exception("[MAIN LOOP] Error en ejecución del ciclo principal")
-
-                await asyncio.sleep(1)
+            try:
+                config = ChillerConfig.from_props(self.props)
+            except ValueError as e:
+                logger.error("[CHILLER] [CONFIG] Configuración inválida, el plugin no arranca: %s", e)
+                return
+            self.props_fingerprint = props_fingerprint(self.props)
+            await self.apply_config(config)
+            self.restore_state()
+            # Visible en /glycolchiller/metrics mientras la instancia está en marcha
+            REGISTRY[self.id] = self.metrics
+
+            # El bucle de control lo ejecuta el coordinador compartido llamando a tick()
+            self.coordinator = get_coordinator(self.cbpi, self.INPUT_POLL_INTERVAL)
+            self.coordinator.register(self)
+            await self.stopped.wait()
 
         except asyncio.CancelledError:
             logger.info("[PLUGIN] Tarea cancelada")
@@ -296,9 +555,32 @@ class GlycolChillerWithDependantTargetTemperature_v1_0_1(CBPiFermenterLogic):
             logger.exception("[PLUGIN] Error inesperado en run")
         finally:
             self.running = False
+            if self.coordinator is not None:
+                self.coordinator.unregister(self)
+            REGISTRY.pop(self.id, None)
             logger.info("[CHILLER] Deteniendo plugin, apagando actuadores...")
+            self.pwm.stop()
+            for channel in self.pwm.channels.values():
+                if channel.state:
+                    channel.state = False
+                    logger.info("[CHILLER] [%s] APAGADO por parada", channel.name)
 
             try:
+                if self.staging is not None:
+                    # Se guarda la parada para respetar el tiempo mínimo apagado al rearrancar
+                    now = self.clock.now()
+                    for stage in self.staging.stages:
+                        if stage.is_on:
+                            stage.switch(False, now)
+                            self.metrics.record_switch(stage, False, "parada", now)
+                            # Misma línea que el resto de transiciones, para los analizadores de logs
+                            logger.info("[CHILLER] [%s] APAGADO por parada", stage.tag)
+                    self.actuator_state = "off"
+                    self.save_state(now)
+
+                # El apagado final se envía siempre: el actor pudo encenderse fuera del plugin
+                self.actor_cache.invalidate()
+
                 if hasattr(self, "compressor1") and self.compressor1 is not None:
                     await self.safe_actor_off(self.compressor1)
                     logger.info("[CHILLER] Compresor 1 apagado al finalizar")
@@ -307,14 +589,37 @@ class GlycolChillerWithDependantTargetTemperature_v1_0_1(CBPiFermenterLogic):
                     await self.safe_actor_off(self.compressor2)
                     logger.info("[CHILLER] Compresor 2 apagado al finalizar")
 
+                if self.staging is not None:
+                    for stage in self.staging.stages:
+                        if stage.actor in (self.compressor1, self.compressor2):
+                            continue
+                        await self.safe_actor_off(stage.actor)
+                        logger.info("[CHILLER] %s apagado al finalizar", stage.tag)
+
                 if hasattr(self, "action_actuator") and self.action_actuator is not None:
                     await self.safe_actor_off(self.action_actuator)
                     logger.info("[CHILLER] Actuador auxiliar apagado al finalizar")
 
+                for actor in self.pwm.channels:
+                    if actor != getattr(self, "action_actuator", None):
+                        await self.safe_actor_off(actor)
+                        logger.info("[CHILLER] Actuador %s apagado al finalizar", actor)
+
+                await self.actor_cache.drain()
+
+                if self.state_store is not None:
+                    await self.state_store.flush()
+
+                if self.action_signal is not None:
+                    await self.action_signal.stop()
+
+                self.close_telemetry()
+
             except Exception:
                 logger.exception("[CHILLER] Error al apagar los actuadores al detener el plugin")
 
 
 def setup(cbpi):
     cbpi.plugin.register("ChillerDepTemp_v1_0_1", GlycolChillerWithDependantTargetTemperature_v1_0_1)
+    cbpi.plugin.register("GlycolChillerEndpoints", GlycolChillerEndpoints)
 
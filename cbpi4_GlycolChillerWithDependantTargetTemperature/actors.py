@@ -0,0 +1,165 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ActorStats:
+    __slots__ = ("commands", "failures", "timeouts", "last_latency", "avg_latency", "max_latency")
+
+    def __init__(self):
+        self.commands = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.last_latency = 0.0
+        self.avg_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency):
+        self.commands += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        # Media móvil exponencial para no guardar historial
+        self.avg_latency = latency if self.commands == 1 else 0.9 * self.avg_latency + 0.1 * latency
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ActorCommandCache:
+    """Caché de estado deseado por actor con envío concurrente.
+
+    ``set()`` solo registra el estado decidido; los comandos que realmente
+    cambian el estado de un actor se acumulan y ``dispatch()`` los envía a la
+    vez, cada uno en su propia tarea con timeout y reintentos con backoff.
+    Un actor lento o colgado no retrasa a los demás ni bloquea el bucle.
+    Cada ``reassert_interval`` segundos se vuelve a enviar el estado deseado
+    (o antes, si el estado real del actor no coincide).
+    """
+
+    def __init__(self, logic, reassert_interval=300, timeout=5, retries=2, backoff=0.5):
+        self.logic = logic
+        self.reassert_interval = reassert_interval
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.desired = {}
+        self.applied = {}
+        self.last_write = {}
+        self.pending = {}
+        self.in_flight = {}
+        self.stats = {}
+        self.issued = 0
+        self.suppressed = 0
+
+    def set(self, actor, on):
+        if actor is None:
+            return
+        self.desired[actor] = on
+
+        in_flight = self.in_flight.get(actor)
+        current = in_flight[0] if in_flight is not None else self.applied.get(actor)
+        if current == on:
+            # Cancela una orden contraria decidida en el mismo ciclo
+            self.pending.pop(actor, None)
+            self.suppressed += 1
+            return
+
+        self.pending[actor] = on
+
+    def reconcile(self, now=None, reader=None):
+        """Reenvía el estado deseado si toca o si el real no coincide (leído con ``reader``)."""
+        now = now or self.logic.clock.now()
+        for actor, on in self.desired.items():
+            if actor in self.pending or actor in self.in_flight:
+                continue
+            last = self.last_write.get(actor)
+            elapsed = float("inf") if last is None else (now - last).total_seconds()
+            actual = self.actual_state(actor, reader)
+            if elapsed >= self.reassert_interval or (actual is not None and actual != on):
+                logger.debug("[CHILLER] [ACTOR] Reafirmando estado %s de %s (real: %s)", "ON" if on else "OFF", actor, actual)
+                self.pending[actor] = on
+
+    def dispatch(self):
+        """Lanza los comandos pendientes sin esperarlos; ``in_flight`` sigue cada tarea."""
+        pending, self.pending = self.pending, {}
+        tasks = []
+        for actor, on in pending.items():
+            previous = self.in_flight.get(actor)
+            if previous is not None:
+                # La nueva orden sustituye a la que sigue en curso
+                previous[1].cancel()
+            task = asyncio.ensure_future(self._dispatch(actor, on))
+            self.in_flight[actor] = (on, task)
+            tasks.append(task)
+        return tasks
+
+    async def flush(self):
+        tasks = self.dispatch()
+        if tasks:
+            # Espera como mucho un timeout; los reintentos siguen en segundo plano
+            await asyncio.wait(tasks, timeout=self.timeout)
+
+    async def drain(self):
+        await self.flush()
+        tasks = [task for _, task in self.in_flight.values()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.timeout * (self.retries + 1) + self._total_backoff())
+
+    def invalidate(self, actor=None):
+        if actor is None:
+            self.applied.clear()
+        else:
+            self.applied.pop(actor, None)
+
+    def summary(self):
+        return {"issued": self.issued, "suppressed": self.suppressed,
+                "actors": {actor: stats.as_dict() for actor, stats in self.stats.items()}}
+
+    async def _dispatch(self, actor, on):
+        stats = self.stats.setdefault(actor, ActorStats())
+        # Estado desconocido hasta que el comando se confirme
+        self.applied.pop(actor, None)
+        try:
+            for attempt in range(self.retries + 1):
+                start = self.logic.clock.monotonic()
+                try:
+                    command = self.logic.actor_on(actor) if on else self.logic.actor_off(actor)
+                    await asyncio.wait_for(command, self.timeout)
+                except asyncio.TimeoutError:
+                    stats.timeouts += 1
+                    logger.warning("[CHILLER] [ACTOR] Timeout enviando %s a %s (intento %d)", "ON" if on else "OFF", actor, attempt + 1)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    stats.failures += 1
+                    logger.exception("[CHILLER] [ACTOR] Error enviando %s a %s (intento %d)", "ON" if on else "OFF", actor, attempt + 1)
+                else:
+                    latency = self.logic.clock.monotonic() - start
+                    stats.record(latency)
+                    self.logic.metrics.observe_actor(actor, latency)
+                    self.applied[actor] = on
+                    self.last_write[actor] = self.logic.clock.now()
+                    self.issued += 1
+                    return
+
+                if attempt < self.retries:
+                    await asyncio.sleep(self.backoff * (2 ** attempt))
+
+            logger.error("[CHILLER] [ACTOR] No se pudo enviar %s a %s tras %d intentos", "ON" if on else "OFF", actor, self.retries + 1)
+        finally:
+            in_flight = self.in_flight.get(actor)
+            if in_flight is not None and in_flight[1] is asyncio.current_task():
+                del self.in_flight[actor]
+
+    def _total_backoff(self):
+        return sum(self.backoff * (2 ** attempt) for attempt in range(self.retries))
+
+    def actual_state(self, actor, reader=None):
+        try:
+            state = (reader or self.logic).get_actor_state(actor)
+        except Exception:
+            return None
+        if isinstance(state, dict):
+            state = state.get("state")
+        return state if isinstance(state, bool) else None
@@ -0,0 +1,32 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """Reloj de pared del sistema (el que se usa en producción)."""
+
+    def now(self):
+        return datetime.now()
+
+    def monotonic(self):
+        return time.monotonic()
+
+
+class LoopClock:
+    """Reloj derivado de ``loop.time()`` del bucle asyncio.
+
+    Con un bucle de tiempo virtual (ver el paquete ``simulation``) permite
+    ejecutar la lógica del plugin días de tiempo simulado en segundos.
+    """
+
+    def __init__(self, start=None, loop=None):
+        self.loop = loop or asyncio.get_event_loop()
+        self.start = start or datetime.now()
+        self.origin = self.loop.time()
+
+    def now(self):
+        return self.start + timedelta(seconds=self.loop.time() - self.origin)
+
+    def monotonic(self):
+        return self.loop.time()
@@ -0,0 +1,225 @@
+from .loglevel import LOG_LEVELS
+from .pid import TARGET_MODES
+from .pwm import DUTY_CURVES
+from .sensors import FAIL_SAFE_MODES
+from .staging import parse_compressor_list
+from .targets import AGGREGATION_POLICIES, parse_fermenter_list
+from .telemetry import SAMPLE_INTERVAL
+
+SIGNAL_SOURCES = ["File", "Config", "MQTT"]
+
+
+def props_fingerprint(props):
+    """Copia comparable de las propiedades (``Props`` de CBPi o dict)."""
+    if props is None:
+        return None
+    if hasattr(props, "to_dict"):
+        props = props.to_dict()
+    return tuple(sorted((str(key), str(value)) for key, value in dict(props).items()))
+
+
+class ChillerConfig:
+    """Configuración tipada e inmutable del chiller.
+
+    Se construye y valida una sola vez a partir de las propiedades de CBPi
+    con ``from_props()``; si hay valores inválidos lanza ``ValueError`` con
+    todos los problemas encontrados. La recta fermentador → chiller se
+    precalcula (``slope`` e ``intercept``). Para reconfigurar se crea un
+    objeto nuevo y se sustituye entero.
+    """
+
+    __slots__ = (
+        "compressor1", "compressor2", "action_actuator", "fermenter", "fermenters", "target_aggregation",
+        "extra_compressors", "extra_actuators",
+        "min_temp_fermenter", "max_temp_fermenter", "min_range_chiller", "max_range_chiller",
+        "slope", "intercept",
+        "offset_on", "offset_off",
+        "compressor1_min_temp", "compressor1_max_temp", "compressor1_time_off",
+        "compressor2_min_temp", "compressor2_max_temp", "compressor2_time_off", "compressor2_time_on",
+        "stage_pulldown_rate", "stage_delay",
+        "watchdog_interval", "actor_reassert_interval", "actor_timeout", "actor_retries",
+        "action_signal_source", "action_signal_target", "action_signal_max_age",
+        "actuator_cycle_seconds", "actuator_min_seconds", "actuator_diff_range", "actuator_duty_curve",
+        "state_file", "log_level", "telemetry_file", "telemetry_days",
+        "precool", "precool_rate", "precool_margin",
+        "target_mode", "pid_kp", "pid_ki", "pid_kd", "pid_deadband",
+        "sensor_filter_window", "sensor_filter_alpha", "sensor_max_rate", "sensor_stale_seconds", "sensor_frozen_seconds",
+        "sensor_deadband",
+        "fail_safe_mode", "fail_safe_duty", "fail_safe_cycle",
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ChillerConfig es inmutable; crea una nueva con from_props()")
+
+    def __eq__(self, other):
+        return isinstance(other, ChillerConfig) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return "ChillerConfig(" + ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__) + ")"
+
+    def chiller_target(self, fermenter_target):
+        target = self.slope * fermenter_target + self.intercept
+        return max(self.min_range_chiller, min(self.max_range_chiller, target))
+
+    @classmethod
+    def from_props(cls, props):
+        errors = []
+
+        def number(label, default, optional=False):
+            value = props.get(label, default)
+            if value in (None, ""):
+                if optional:
+                    return None
+                value = default
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                errors.append(f"{label}={value!r} no es un número")
+                return default
+
+        def choice(label, options, default):
+            value = props.get(label) or default
+            if value not in options:
+                errors.append(f"{label}={value!r} no es una de {options}")
+                return default
+            return value
+
+        def check(condition, message):
+            if not condition:
+                errors.append(message)
+
+        values = dict(
+            compressor1=props.get("MainCompressor"),
+            compressor2=props.get("SecondaryCompressor"),
+            action_actuator=props.get("ActionActuator"),
+            fermenter=props.get("DependantFermenter"),
+            target_aggregation=choice("TargetAggregation", AGGREGATION_POLICIES, "Min"),
+            min_temp_fermenter=number("MinTempFermenter", 0),
+            max_temp_fermenter=number("MaxTempFermenter", 20),
+            min_range_chiller=number("MinTempChillerRange", -6),
+            max_range_chiller=number("MaxTempChillerRange", 10),
+            offset_on=number("ChillerOffsetOn", 1),
+            offset_off=number("ChillerOffsetOff", 1),
+            compressor1_min_temp=number("MinTempCompressor1Range", -10),
+            compressor1_max_temp=number("MaxTempCompressor1Range", 20),
+            compressor1_time_off=number("Compressor1TimeOff", 3),
+            compressor2_min_temp=number("MinTempCompressor2Range", -10),
+            compressor2_max_temp=number("MaxTempCompressor2Range", 5),
+            compressor2_time_off=number("Compressor2TimeOff", 25),
+            compressor2_time_on=number("Compressor2TimeOn", 180),
+            stage_pulldown_rate=number("StagePulldownRate", 0),
+            stage_delay=number("StageDelay", 5),
+            watchdog_interval=number("WatchdogInterval", 30),
+            actor_reassert_interval=number("ActorReassertInterval", 300),
+            actor_timeout=number("ActorTimeout", 5),
+            actor_retries=number("ActorRetries", 2),
+            action_signal_source=choice("ActionSignalSource", SIGNAL_SOURCES, "File"),
+            action_signal_target=props.get("ActionSignalTarget") or None,
+            action_signal_max_age=number("ActionSignalMaxAge", None, optional=True),
+            actuator_cycle_seconds=number("ActuatorCycleSeconds", 120),
+            actuator_min_seconds=number("ActuatorMinSeconds", 5),
+            actuator_diff_range=number("ActuatorDiffRange", 10),
+            actuator_duty_curve=choice("ActuatorDutyCurve", list(DUTY_CURVES), "Linear"),
+            state_file=props.get("StateFile") or None,
+            log_level=props.get("LogLevel") or None,
+            telemetry_file=props.get("TelemetryFile") or None,
+            telemetry_days=number("TelemetryDays", 7),
+            precool=choice("PrecoolMode", ["No", "Yes"], "No") == "Yes",
+            precool_rate=number("PrecoolRate", 0.05),
+            precool_margin=number("PrecoolMargin", 15),
+            target_mode=choice("TargetMode", TARGET_MODES, "Linear"),
+            pid_kp=number("PidKp", 2.0),
+            pid_ki=number("PidKi", 0.02),
+            pid_kd=number("PidKd", 0),
+            pid_deadband=number("PidDeadband", 0.3),
+            sensor_filter_window=number("SensorFilterWindow", 5),
+            sensor_filter_alpha=number("SensorFilterAlpha", 0.5),
+            sensor_max_rate=number("SensorMaxRate", 0),
+            sensor_stale_seconds=number("SensorStaleSeconds", 120),
+            sensor_frozen_seconds=number("SensorFrozenSeconds", 3600),
+            sensor_deadband=number("SensorDeadband", 0.03),
+            fail_safe_mode=choice("FailSafeMode", FAIL_SAFE_MODES, "Off"),
+            fail_safe_duty=number("FailSafeDuty", 30),
+            fail_safe_cycle=number("FailSafeCycle", 30),
+        )
+
+        try:
+            extra = parse_compressor_list(props.get("ExtraCompressors"))
+            values["extra_compressors"] = tuple(tuple(sorted(options.items())) for options in extra)
+        except ValueError as e:
+            errors.append(f"ExtraCompressors inválido: {e}")
+            values["extra_compressors"] = ()
+
+        # Mismo formato que ExtraCompressors: 'actor cycle=120 min=5' (segundos)
+        try:
+            extra = parse_compressor_list(props.get("ExtraActuators"))
+            values["extra_actuators"] = tuple(tuple(sorted(options.items())) for options in extra)
+        except ValueError as e:
+            errors.append(f"ExtraActuators inválido: {e}")
+            values["extra_actuators"] = ()
+
+        # El fermentador principal más los adicionales, sin duplicados
+        fermenters = [(values["fermenter"], 1.0)] if values["fermenter"] else []
+        try:
+            for fermenter_id, weight in parse_fermenter_list(props.get("DependantFermenters")):
+                check(weight > 0, f"El peso de {fermenter_id} debe ser positivo")
+                if fermenter_id == values["fermenter"]:
+                    fermenters[0] = (fermenter_id, weight)
+                elif fermenter_id not in dict(fermenters):
+                    fermenters.append((fermenter_id, weight))
+        except ValueError as e:
+            errors.append(f"DependantFermenters inválido: {e}")
+        values["fermenters"] = tuple(fermenters)
+        check(fermenters, "No hay ningún fermentador dependiente")
+
+        v = values
+        check(v["max_temp_fermenter"] > v["min_temp_fermenter"], "MaxTempFermenter debe ser mayor que MinTempFermenter")
+        check(v["max_range_chiller"] >= v["min_range_chiller"], "MaxTempChillerRange debe ser mayor o igual que MinTempChillerRange")
+        check(v["offset_on"] >= 0 and v["offset_off"] >= 0, "Los offsets del chiller no pueden ser negativos")
+        check(v["compressor1_max_temp"] >= v["compressor1_min_temp"], "Rango del compresor 1 invertido")
+        check(v["compressor2_max_temp"] >= v["compressor2_min_temp"], "Rango del compresor 2 invertido")
+        check(min(v["compressor1_time_off"], v["compressor2_time_off"], v["compressor2_time_on"], v["stage_delay"]) >= 0,
+              "Los tiempos de los compresores no pueden ser negativos")
+        check(v["stage_pulldown_rate"] >= 0, "StagePulldownRate no puede ser negativo")
+        check(v["watchdog_interval"] > 0, "WatchdogInterval debe ser positivo")
+        check(v["actor_reassert_interval"] > 0, "ActorReassertInterval debe ser positivo")
+        check(v["actor_timeout"] > 0, "ActorTimeout debe ser positivo")
+        check(v["actor_retries"] >= 0, "ActorRetries no puede ser negativo")
+        check(v["action_signal_max_age"] is None or v["action_signal_max_age"] > 0, "ActionSignalMaxAge debe ser positivo")
+        check(v["actuator_cycle_seconds"] > 2 * v["actuator_min_seconds"] >= 0,
+              "ActuatorCycleSeconds debe ser mayor que dos veces ActuatorMinSeconds")
+        for options in map(dict, v["extra_actuators"]):
+            cycle = options.get("cycle", v["actuator_cycle_seconds"])
+            check(cycle > 2 * options.get("min", v["actuator_min_seconds"]) >= 0,
+                  f"ExtraActuators: el ciclo de {options['actor']} debe ser mayor que dos veces su mínimo")
+        check(v["actuator_diff_range"] > 0, "ActuatorDiffRange debe ser positivo")
+        check(v["telemetry_days"] == 0 or v["telemetry_days"] * 86400 >= SAMPLE_INTERVAL,
+              "TelemetryDays debe ser 0 (desactivada) o dar cabida al menos a un registro")
+        check(v["precool_rate"] > 0, "PrecoolRate debe ser positivo")
+        check(v["precool_margin"] >= 0, "PrecoolMargin no puede ser negativo")
+        check(v["sensor_filter_window"] >= 1, "SensorFilterWindow debe ser al menos 1")
+        check(0 < v["sensor_filter_alpha"] <= 1, "SensorFilterAlpha debe estar entre 0 (excluido) y 1")
+        check(min(v["sensor_max_rate"], v["sensor_stale_seconds"], v["sensor_frozen_seconds"], v["sensor_deadband"]) >= 0,
+              "SensorMaxRate, SensorStaleSeconds, SensorFrozenSeconds y SensorDeadband no pueden ser negativos")
+        check(0 <= v["fail_safe_duty"] <= 100, "FailSafeDuty debe estar entre 0 y 100")
+        check(v["fail_safe_cycle"] > 0, "FailSafeCycle debe ser positivo")
+        check(min(v["pid_kp"], v["pid_ki"], v["pid_kd"], v["pid_deadband"]) >= 0,
+              "Las ganancias y la banda muerta del PID no pueden ser negativas")
+        check(v["log_level"] is None or v["log_level"] in LOG_LEVELS, f"LogLevel={v['log_level']!r} no es uno de {list(LOG_LEVELS)}")
+
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        v["actor_retries"] = int(v["actor_retries"])
+        v["sensor_filter_window"] = int(v["sensor_filter_window"])
+        v["slope"] = (v["max_range_chiller"] - v["min_range_chiller"]) / (v["max_temp_fermenter"] - v["min_temp_fermenter"])
+        v["intercept"] = v["min_range_chiller"] - v["slope"] * v["min_temp_fermenter"]
+        return cls(**v)
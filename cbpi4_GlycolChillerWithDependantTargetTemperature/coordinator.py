@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# Un coordinador por instancia de CBPi (en la práctica, uno por proceso)
+_COORDINATORS = weakref.WeakKeyDictionary()
+
+
+def get_coordinator(cbpi, interval):
+    coordinator = _COORDINATORS.get(cbpi)
+    if coordinator is None:
+        coordinator = _COORDINATORS[cbpi] = Coordinator(cbpi, interval)
+    return coordinator
+
+
+class TickSnapshot:
+    """Lecturas de un tick: cada sensor, fermentador y actor se consulta una sola vez.
+
+    El estado de los actores se lee con ``get_actor_state()`` de ``logic``
+    (la API de CBPi es la misma para todas las instancias).
+    """
+
+    def __init__(self, cbpi, logic=None):
+        self.cbpi = cbpi
+        self.logic = logic
+        self.sensors = {}
+        self.fermenters = {}
+        self.actors = {}
+
+    def get_sensor_value(self, id):
+        try:
+            return self.sensors[id]
+        except KeyError:
+            pass
+        try:
+            value = self.cbpi.sensor.get_sensor_value(id)
+        except Exception:
+            value = None
+        self.sensors[id] = value
+        return value
+
+    def get_fermenter(self, id):
+        try:
+            return self.fermenters[id]
+        except KeyError:
+            fermenter = self.fermenters[id] = self.cbpi.fermenter._find_by_id(id)
+            return fermenter
+
+    def get_actor_state(self, id):
+        try:
+            return self.actors[id]
+        except KeyError:
+            state = self.actors[id] = self.logic.get_actor_state(id)
+            return state
+
+
+class Coordinator:
+    """Bucle único que hace avanzar a todas las instancias del chiller a la vez.
+
+    En cada tick crea un ``TickSnapshot`` compartido, ejecuta ``tick()`` de
+    cada instancia sobre él y después lanza juntos, sin esperarlos, los
+    comandos pendientes de todos los cachés de actores. Las instancias se
+    registran al arrancar y salen del coordinador al detenerse; el bucle
+    termina cuando no queda ninguna.
+    """
+
+    def __init__(self, cbpi, interval=0.5):
+        self.cbpi = cbpi
+        self.interval = interval
+        self.instances = {}
+        self.task = None
+        self._wakeup = asyncio.Event()
+
+    def register(self, logic):
+        self.instances[logic.id] = logic
+        logic.stopped = asyncio.Event()
+        logger.info("[CHILLER] [COORDINATOR] %s registrado (%d instancias)", logic.id, len(self.instances))
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._run())
+        self.notify()
+
+    def unregister(self, logic):
+        if self.instances.get(logic.id) is logic:
+            del self.instances[logic.id]
+            logger.info("[CHILLER] [COORDINATOR] %s retirado (%d instancias)", logic.id, len(self.instances))
+        if logic.stopped is not None:
+            logic.stopped.set()
+
+    def notify(self):
+        """Adelanta el siguiente tick (por ejemplo, tras un cambio de configuración)."""
+        self._wakeup.set()
+
+    async def _run(self):
+        while self.instances:
+            snapshot = TickSnapshot(self.cbpi, next(iter(self.instances.values())))
+            for logic in list(self.instances.values()):
+                if not logic.running:
+                    self.unregister(logic)
+                    continue
+                try:
+                    await logic.tick(snapshot)
+                except Exception:
+                    logger.exception("[CHILLER] [COORDINATOR] Error en el tick de %s", logic.id)
+
+            # Comandos de todas las instancias en paralelo, sin esperarlos: un actor
+            # colgado no debe retrasar el tick de los demás circuitos
+            for logic in self.instances.values():
+                if logic.actor_cache.pending:
+                    logic.actor_cache.dispatch()
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import math
+
+from aiohttp import web
+from cbpi.api import *
+
+from .loglevel import LOG_LEVELS, get_log_level, set_log_level
+from .metrics import REGISTRY, render
+from .telemetry import TELEMETRY
+
+logger = logging.getLogger(__name__)
+
+
+class GlycolChillerEndpoints(CBPiExtension):
+    """Endpoints HTTP del plugin bajo ``/glycolchiller``."""
+
+    def __init__(self, cbpi):
+        self.cbpi = cbpi
+        self.cbpi.register(self, "/glycolchiller")
+
+    @request_mapping(path="/loglevel", method="GET", auth_required=False)
+    async def get_loglevel(self, request):
+        return web.json_response({"level": get_log_level(), "levels": list(LOG_LEVELS)})
+
+    # Cambia el comportamiento del proceso: misma autenticación que el resto de endpoints de escritura de CBPi
+    @request_mapping(path="/loglevel/{level}", method="PUT")
+    async def put_loglevel(self, request):
+        level = request.match_info["level"]
+        try:
+            set_log_level(level)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        # Se registra como warning para que quede constancia con cualquier nivel salvo Off/Error
+        logger.warning("[PLUGIN] Nivel de log cambiado a %s", level)
+        return web.json_response({"level": get_log_level()})
+
+    @request_mapping(path="/metrics", method="GET", auth_required=False)
+    async def get_metrics(self, request):
+        # Copia rápida en el bucle; el formateo se hace en un hilo aparte
+        snapshots = [metrics.snapshot() for metrics in list(REGISTRY.values())]
+        text = await asyncio.get_event_loop().run_in_executor(None, render, snapshots)
+        return web.Response(text=text, content_type="text/plain")
+
+    @request_mapping(path="/telemetry/{id}", method="GET", auth_required=False)
+    async def get_telemetry(self, request):
+        ring = TELEMETRY.get(request.match_info["id"])
+        if ring is None:
+            return web.json_response({"error": "Sin telemetría para ese fermentador"}, status=404)
+        try:
+            start = float(request.query["start"]) if "start" in request.query else None
+            end = float(request.query["end"]) if "end" in request.query else None
+            points = int(request.query.get("points", 1000))
+            if any(value is not None and math.isnan(value) for value in (start, end)):
+                raise ValueError("NaN")
+        except ValueError:
+            return web.json_response({"error": "start/end/points inválidos"}, status=400)
+        # La consulta recorre el mapa en un hilo aparte a partir de la posición actual
+        view = ring.view()
+        rows = await asyncio.get_event_loop().run_in_executor(None, ring.query, start, end, points, view)
+        return web.json_response({"id": request.match_info["id"], "points": rows})
@@ -0,0 +1,127 @@
+import logging
+
+from .sensors import SensorFilter
+from .targets import TargetAggregator
+
+logger = logging.getLogger(__name__)
+
+
+class InputWatcher:
+    """Capa de entrada con detección de cambios.
+
+    Lee la temperatura del chiller y el objetivo de cada fermentador
+    dependiente (lecturas en memoria, baratas). Solo los fermentadores cuyo
+    objetivo cambia se actualizan en el agregador, y solo se informa de
+    cambio cuando la temperatura o el objetivo agregado difieren del último
+    procesado. Las lecturas se hacen a través de ``reader`` (el
+    ``TickSnapshot`` compartido del coordinador, o la propia lógica). Con
+    ``precool`` (un ``Precooler``) el objetivo de cada fermentador se
+    adelanta al de su siguiente paso.
+
+    Cada sondeo cuesta O(N) en el número de fermentadores: CBPi no avisa de
+    los cambios de objetivo, así que hay que mirarlos todos. Son búsquedas
+    en memoria, compartidas entre instancias por el ``TickSnapshot``; lo
+    caro (agregador, filtros de los fermentadores) solo se hace para los
+    que cambian o cuando la política lo necesita.
+
+    Cada sensor pasa por su propio ``SensorFilter`` (opciones en
+    ``sensor_filter``). Si el sensor del chiller no tiene lectura o está en
+    fallo, ``sensor_fault`` se activa y la temperatura devuelta es ``None``.
+    Las temperaturas de los fermentadores se filtran una vez por sondeo, si
+    la política ``Demand`` o ``track_temps`` (el modo PID) las necesitan, y
+    quedan en ``temps`` para ``fermenter_error()``.
+    """
+
+    def __init__(self, logic, fermenters, policy="Min", sensor_deadband=0.0, precool=None, sensor_filter=None):
+        self.logic = logic
+        self.fermenters = [fermenter for fermenter, _ in fermenters]
+        self.aggregator = TargetAggregator(policy, dict(fermenters))
+        self.sensor_deadband = sensor_deadband
+        self.precool = precool
+        self.sensor_filter = sensor_filter or {}
+        self.filters = {}
+        self.sensor_fault = False
+        self.chiller_temp = None
+        self.fermenter_target = None
+        self.targets = {}
+        self.temps = {}
+        self.track_temps = False
+        self.reader = logic
+
+    def read(self):
+        chiller_temp = self._filter(self.logic.chiller.sensor).update(self._raw(self.logic.chiller.sensor))
+
+        demand = self.aggregator.policy == "Demand"
+        track = demand or self.track_temps
+        now = self.logic.clock.now() if self.precool is not None else None
+        for fermenter_id in self.fermenters:
+            fermenter = self.reader.get_fermenter(fermenter_id)
+            if fermenter is None or fermenter.target_temp is None:
+                self.targets.pop(fermenter_id, None)
+                self.temps.pop(fermenter_id, None)
+                self.aggregator.remove(fermenter_id)
+                continue
+
+            target = float(fermenter.target_temp)
+            if self.precool is not None:
+                target = self.precool.adjust(fermenter_id, fermenter, target, now)
+            temp = self.temps[fermenter_id] = self._fermenter_temp(fermenter) if track else None
+            entry = (target, temp if demand else None)
+            if self.targets.get(fermenter_id) != entry:
+                self.targets[fermenter_id] = entry
+                self.aggregator.update(fermenter_id, *entry)
+
+        fermenter_target = self.aggregator.value
+        if fermenter_target is None:
+            raise ValueError("Ningún fermentador dependiente tiene objetivo")
+        return chiller_temp, fermenter_target
+
+    def poll(self, reader=None):
+        self.reader = reader or self.logic
+        chiller_temp, fermenter_target = self.read()
+        fault = chiller_temp is None or self._filter(self.logic.chiller.sensor).faulted
+
+        if fault:
+            changed = not self.sensor_fault or fermenter_target != self.fermenter_target
+            chiller_temp = None
+        else:
+            changed = (
+                self.sensor_fault
+                or self.chiller_temp is None
+                or abs(chiller_temp - self.chiller_temp) > self.sensor_deadband
+                or fermenter_target != self.fermenter_target
+            )
+        self.sensor_fault = fault
+        if changed:
+            self.chiller_temp = chiller_temp
+            self.fermenter_target = fermenter_target
+
+        return changed, self.chiller_temp, self.fermenter_target
+
+    def fermenter_error(self):
+        """Mayor ``temperatura - objetivo`` entre los fermentadores (el que más frío pide)."""
+        errors = []
+        for fermenter_id, (target, _) in self.targets.items():
+            # Lecturas ya filtradas en read(): filtrar otra vez contaría la muestra dos veces
+            temp = self.temps.get(fermenter_id)
+            if temp is not None:
+                errors.append(temp - target)
+        return max(errors) if errors else None
+
+    def _fermenter_temp(self, fermenter):
+        sensor_filter = self._filter(fermenter.sensor)
+        value = sensor_filter.update(self._raw(fermenter.sensor))
+        return None if sensor_filter.faulted else value
+
+    def _filter(self, sensor):
+        sensor_filter = self.filters.get(sensor)
+        if sensor_filter is None:
+            sensor_filter = self.filters[sensor] = SensorFilter(sensor, self.logic.clock, **self.sensor_filter)
+        return sensor_filter
+
+    def _raw(self, sensor):
+        try:
+            value = self.reader.get_sensor_value(sensor).get("value")
+            return None if value is None else float(value)
+        except Exception:
+            return None
@@ -0,0 +1,27 @@
+import logging
+
+# Nivel del logger del paquete; los módulos heredan de él
+LOG_LEVELS = {
+    "Off": logging.CRITICAL + 1,  # No emite ningún log
+    "Error": logging.ERROR,
+    "Warning": logging.WARNING,
+    "Info": logging.INFO,
+    "Debug": logging.DEBUG,
+}
+
+package_logger = logging.getLogger(__package__)
+
+
+def set_log_level(name):
+    """Cambia en caliente el nivel de log de todo el plugin."""
+    if name not in LOG_LEVELS:
+        raise ValueError(f"Nivel de log {name!r} no es uno de {list(LOG_LEVELS)}")
+    package_logger.setLevel(LOG_LEVELS[name])
+
+
+def get_log_level():
+    level = package_logger.level
+    for name, value in LOG_LEVELS.items():
+        if value == level:
+            return name
+    return logging.getLevelName(level)
@@ -0,0 +1,254 @@
+import logging
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+DURATION_BUCKETS = (60, 300, 600, 1800, 3600, 7200, 14400, 43200)
+ERROR_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5)
+
+# Instancias en marcha: id del fermentador → ControlMetrics
+REGISTRY = {}
+
+
+class Histogram:
+    """Histograma con cubetas fijas (memoria constante)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        return list(self.counts), self.sum, self.count
+
+
+class SlidingWindow:
+    """Suma de los últimos ``slots`` × ``width`` segundos en un anillo fijo."""
+
+    __slots__ = ("slots", "width", "values", "epochs")
+
+    def __init__(self, slots=60, width=60):
+        self.slots = slots
+        self.width = width
+        self.values = [0.0] * slots
+        self.epochs = [None] * slots
+
+    def add(self, timestamp, value=1.0):
+        epoch = int(timestamp // self.width)
+        slot = epoch % self.slots
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.values[slot] = 0.0
+        self.values[slot] += value
+
+    def total(self, timestamp):
+        epoch = int(timestamp // self.width)
+        return sum(value for value, start in zip(self.values, self.epochs)
+                   if start is not None and 0 <= epoch - start < self.slots)
+
+    @property
+    def seconds(self):
+        return self.slots * self.width
+
+
+class StageMetrics:
+
+    __slots__ = ("starts", "on_seconds", "recent_starts", "recent_on", "on_durations", "off_durations",
+                 "off_reason", "is_on", "last_on", "last_off")
+
+    def __init__(self):
+        self.starts = 0
+        self.on_seconds = 0.0
+        self.recent_starts = SlidingWindow()
+        self.recent_on = SlidingWindow()
+        self.on_durations = Histogram(DURATION_BUCKETS)
+        self.off_durations = Histogram(DURATION_BUCKETS)
+        self.off_reason = None
+        self.is_on = False
+        self.last_on = None
+        self.last_off = None
+
+
+class ControlMetrics:
+    """Contadores e histogramas del bucle de control de una instancia.
+
+    Todas las estructuras tienen tamaño fijo: las etiquetas son las etapas,
+    los actores y los motivos de apagado, que están acotados. ``snapshot()``
+    copia los valores en el bucle y ``render()`` los formatea en texto de
+    Prometheus, de modo que el formateo puede hacerse fuera del bucle.
+    """
+
+    def __init__(self, id, clock):
+        self.id = id
+        self.clock = clock
+        self.tick_duration = Histogram(LATENCY_BUCKETS)
+        self.sensor_latency = Histogram(LATENCY_BUCKETS)
+        self.actor_latency = {}
+        self.stages = {}
+        # Segundos apagado y número de apagados por etapa y motivo: {etapa: {motivo: valor}}
+        self.off_reason_seconds = {}
+        self.off_reason_count = {}
+        self.target_error = None
+        self.abs_target_error = Histogram(ERROR_BUCKETS)
+
+    def observe_tick(self, seconds):
+        self.tick_duration.observe(seconds)
+
+    def observe_sensor(self, seconds):
+        self.sensor_latency.observe(seconds)
+
+    def observe_actor(self, actor, seconds):
+        histogram = self.actor_latency.get(actor)
+        if histogram is None:
+            histogram = self.actor_latency[actor] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def observe_target(self, current_temp, target_temp):
+        self.target_error = current_temp - target_temp
+        self.abs_target_error.observe(abs(self.target_error))
+
+    def record_switch(self, stage, on, reason, now):
+        metrics = self.stages.get(stage.tag)
+        if metrics is None:
+            metrics = self.stages[stage.tag] = StageMetrics()
+        timestamp = now.timestamp()
+
+        if on:
+            metrics.starts += 1
+            metrics.recent_starts.add(timestamp)
+            metrics.is_on, metrics.last_on = True, timestamp
+            if stage.last_off is not None:
+                off_seconds = max((now - stage.last_off).total_seconds(), 0.0)
+                metrics.off_durations.observe(off_seconds)
+                if metrics.off_reason is not None:
+                    seconds = self.off_reason_seconds.setdefault(stage.tag, {})
+                    seconds[metrics.off_reason] = seconds.get(metrics.off_reason, 0.0) + off_seconds
+        else:
+            on_seconds = max((now - stage.last_on).total_seconds(), 0.0) if stage.last_on is not None else 0.0
+            metrics.on_seconds += on_seconds
+            metrics.recent_on.add(timestamp, on_seconds)
+            metrics.on_durations.observe(on_seconds)
+            metrics.is_on, metrics.last_off = False, timestamp
+            metrics.off_reason = reason
+            counts = self.off_reason_count.setdefault(stage.tag, {})
+            counts[reason] = counts.get(reason, 0) + 1
+
+    def snapshot(self):
+        timestamp = self.clock.now().timestamp()
+        stages = {}
+        off_reason_seconds = {tag: dict(reasons) for tag, reasons in self.off_reason_seconds.items()}
+        for tag, metrics in self.stages.items():
+            if not metrics.is_on and metrics.off_reason is not None and metrics.last_off is not None:
+                # La parada en curso cuenta para su motivo, igual que la marcha en curso para on_seconds
+                reasons = off_reason_seconds.setdefault(tag, {})
+                reasons[metrics.off_reason] = reasons.get(metrics.off_reason, 0.0) + max(timestamp - metrics.last_off, 0.0)
+            current_on = max(timestamp - metrics.last_on, 0.0) if metrics.is_on else 0.0
+            window = metrics.recent_on.seconds
+            stages[tag] = dict(
+                starts=metrics.starts,
+                starts_per_hour=metrics.recent_starts.total(timestamp) * 3600 / metrics.recent_starts.seconds,
+                on_seconds=metrics.on_seconds + current_on,
+                # Aproximado: cada marcha cuenta entera en el minuto en que termina
+                duty=min((metrics.recent_on.total(timestamp) + current_on) / window, 1.0),
+                is_on=metrics.is_on,
+                on_durations=metrics.on_durations.snapshot(),
+                off_durations=metrics.off_durations.snapshot(),
+            )
+        return dict(
+            id=self.id,
+            tick_duration=self.tick_duration.snapshot(),
+            sensor_latency=self.sensor_latency.snapshot(),
+            actor_latency={actor: histogram.snapshot() for actor, histogram in self.actor_latency.items()},
+            stages=stages,
+            off_reason_seconds=off_reason_seconds,
+            off_reason_count={tag: dict(reasons) for tag, reasons in self.off_reason_count.items()},
+            target_error=self.target_error,
+            abs_target_error=self.abs_target_error.snapshot(),
+        )
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(lines, name, buckets, snapshot, **labels):
+    counts, total, count = snapshot
+    cumulative = 0
+    for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+        cumulative += bucket_count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total}")
+    lines.append(f"{name}_count{_labels(**labels)} {count}")
+
+
+def render(snapshots):
+    """Formatea instantáneas de ``ControlMetrics.snapshot()`` en texto de Prometheus."""
+    families = {}
+
+    def family(name, kind, help):
+        if name not in families:
+            families[name] = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        return families[name]
+
+    for data in snapshots:
+        fermenter = data["id"]
+        for key, name, help in (
+            ("tick_duration", "glycol_chiller_tick_seconds", "Duración de un ciclo de control"),
+            ("sensor_latency", "glycol_chiller_sensor_read_seconds", "Latencia de lectura de las entradas"),
+        ):
+            _histogram_lines(family(name, "histogram", help), name, LATENCY_BUCKETS, data[key], fermenter=fermenter)
+
+        name = "glycol_chiller_actor_command_seconds"
+        for actor, snapshot in data["actor_latency"].items():
+            _histogram_lines(family(name, "histogram", "Latencia de los comandos a actores"), name, LATENCY_BUCKETS,
+                             snapshot, fermenter=fermenter, actor=actor)
+
+        for tag, stage in data["stages"].items():
+            labels = _labels(fermenter=fermenter, stage=tag)
+            family("glycol_chiller_compressor_starts_total", "counter", "Arranques de cada compresor").append(
+                f"glycol_chiller_compressor_starts_total{labels} {stage['starts']}")
+            family("glycol_chiller_compressor_starts_per_hour", "gauge", "Arranques en la última hora").append(
+                f"glycol_chiller_compressor_starts_per_hour{labels} {stage['starts_per_hour']}")
+            family("glycol_chiller_compressor_on_seconds_total", "counter", "Tiempo total encendido").append(
+                f"glycol_chiller_compressor_on_seconds_total{labels} {stage['on_seconds']}")
+            family("glycol_chiller_compressor_duty_ratio", "gauge", "Fracción encendido en la última hora").append(
+                f"glycol_chiller_compressor_duty_ratio{labels} {stage['duty']}")
+            family("glycol_chiller_compressor_on", "gauge", "1 si el compresor está encendido").append(
+                f"glycol_chiller_compressor_on{labels} {int(stage['is_on'])}")
+            for key, name, help in (
+                ("on_durations", "glycol_chiller_compressor_on_duration_seconds", "Duración de cada marcha"),
+                ("off_durations", "glycol_chiller_compressor_off_duration_seconds", "Duración de cada parada"),
+            ):
+                _histogram_lines(family(name, "histogram", help), name, DURATION_BUCKETS, stage[key],
+                                 fermenter=fermenter, stage=tag)
+
+        for tag, reasons in data["off_reason_seconds"].items():
+            for reason, seconds in reasons.items():
+                family("glycol_chiller_off_reason_seconds_total", "counter", "Tiempo apagado según el motivo del apagado").append(
+                    f"glycol_chiller_off_reason_seconds_total{_labels(fermenter=fermenter, stage=tag, reason=reason)} {seconds}")
+        for tag, reasons in data["off_reason_count"].items():
+            for reason, count in reasons.items():
+                family("glycol_chiller_off_reason_total", "counter", "Apagados de compresor por motivo").append(
+                    f"glycol_chiller_off_reason_total{_labels(fermenter=fermenter, stage=tag, reason=reason)} {count}")
+
+        if data["target_error"] is not None:
+            family("glycol_chiller_target_error_celsius", "gauge", "Temp. del chiller menos su objetivo").append(
+                f"glycol_chiller_target_error_celsius{_labels(fermenter=fermenter)} {data['target_error']}")
+        name = "glycol_chiller_abs_target_error_celsius"
+        _histogram_lines(family(name, "histogram", "Error absoluto respecto al objetivo en cada ciclo"), name,
+                         ERROR_BUCKETS, data["abs_target_error"], fermenter=fermenter)
+
+    return "\n".join(line for lines in families.values() for line in lines) + "\n"
@@ -0,0 +1,65 @@
+TARGET_MODES = ["Linear", "PID"]
+
+
+class PidController:
+    """PID del lazo exterior: error del fermentador → corrección del objetivo del glicol.
+
+    ``update()`` devuelve la corrección que se resta al objetivo de la recta
+    (feed-forward), limitada a ``[low, high]``. Anti-windup por integración
+    condicional: la integral no crece mientras la salida está saturada en
+    el mismo sentido del error. La derivada se calcula sobre el error
+    filtrado. Dentro de ``deadband`` el error cuenta como cero, para no
+    mover el objetivo (ni arrancar compresores) por la oscilación normal
+    del fermentador. ``ki`` está en 1/min y ``kd`` en min.
+    """
+
+    def __init__(self, kp=2.0, ki=0.02, kd=0.0, deadband=0.0, derivative_filter=0.2):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.deadband = deadband
+        self.derivative_filter = derivative_filter
+        self.integral = 0.0
+        self.filtered_error = None
+        self.last_time = None
+        self.output = 0.0
+
+    def configure(self, kp, ki, kd, deadband=0.0):
+        # La integral se conserva para no dar un salto al cambiar las ganancias
+        self.kp, self.ki, self.kd, self.deadband = kp, ki, kd, deadband
+
+    def reset(self):
+        self.integral = 0.0
+        self.filtered_error = None
+        self.last_time = None
+        self.output = 0.0
+
+    def update(self, error, now, low, high):
+        dt = 0.0 if self.last_time is None else max((now - self.last_time).total_seconds() / 60, 0.0)
+        self.last_time = now
+        error = max(abs(error) - self.deadband, 0.0) * (1 if error > 0 else -1)
+
+        previous = self.filtered_error
+        if previous is None:
+            self.filtered_error = error
+        else:
+            self.filtered_error += self.derivative_filter * (error - previous)
+        derivative = (self.filtered_error - previous) / dt if previous is not None and dt > 0 else 0.0
+
+        integral = self.integral + self.ki * error * dt
+        output = self.kp * error + integral + self.kd * derivative
+        saturated_high = output > high and error > 0
+        saturated_low = output < low and error < 0
+        if not (saturated_high or saturated_low):
+            self.integral = integral
+        # La integral sola nunca debe superar los límites de la salida
+        self.integral = min(max(self.integral, low), high)
+
+        self.output = min(max(self.kp * error + self.integral + self.kd * derivative, low), high)
+        return self.output
+
+    def snapshot(self):
+        return {"integral": self.integral}
+
+    def restore(self, data):
+        self.integral = float(data.get("integral", 0.0))
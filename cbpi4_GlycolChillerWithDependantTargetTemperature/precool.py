@@ -0,0 +1,120 @@
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def _status(step):
+    status = getattr(step, "status", None)
+    return getattr(status, "value", status)
+
+
+def _step_temp(step):
+    props = getattr(step, "props", None) or {}
+    try:
+        value = props.get("Temp")
+        return None if value in (None, "") else float(value)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class CoolingRateEstimator:
+    """Ritmo de enfriamiento del depósito de glicol (°C/min) aprendido en marcha.
+
+    Mientras algún compresor está encendido se mide la bajada de
+    temperatura en ventanas de ``window`` minutos y se suaviza con una
+    media móvil exponencial. Con los compresores apagados la ventana se
+    descarta.
+    """
+
+    def __init__(self, rate=0.05, window=10, alpha=0.2, minimum=0.005):
+        self.rate = rate
+        self.window = window * 60
+        self.alpha = alpha
+        self.minimum = minimum
+        self.start_time = None
+        self.start_temp = None
+
+    def observe(self, now, temp, cooling):
+        if not cooling:
+            self.start_time = None
+            return
+        if self.start_time is None:
+            self.start_time, self.start_temp = now, temp
+            return
+
+        elapsed = (now - self.start_time).total_seconds()
+        if elapsed < self.window:
+            return
+        drop = self.start_temp - temp
+        if drop > 0:
+            sample = drop / (elapsed / 60)
+            self.rate = max((1 - self.alpha) * self.rate + self.alpha * sample, self.minimum)
+            logger.debug("[CHILLER] [PRECOOL] Ritmo de enfriamiento medido: %.3f °C/min (media %.3f)", sample, self.rate)
+        self.start_time, self.start_temp = now, temp
+
+
+class Precooler:
+    """Adelanta el objetivo del chiller al siguiente paso de cada fermentador.
+
+    Con el paso activo temporizado (``endtime``) y un paso siguiente más
+    frío, el objetivo del fermentador se rebaja en rampa para que el glicol
+    llegue al nuevo objetivo ``margin`` minutos antes del cambio de paso,
+    al ritmo aprendido por ``CoolingRateEstimator``. El plan de cada
+    fermentador (instante del cambio y objetivo siguiente) se calcula una
+    vez por paso y se reutiliza mientras el paso activo no cambie.
+    """
+
+    def __init__(self, config, estimator, margin=15):
+        self.config = config
+        self.estimator = estimator
+        self.margin = margin
+        self.plans = {}
+        self.active = set()
+
+    def adjust(self, fermenter_id, fermenter, target, now):
+        plan = self._plan(fermenter_id, fermenter)
+        if plan is None:
+            return target
+        change_time, next_target = plan
+        if next_target >= target:
+            return target
+
+        remaining = (change_time - now).total_seconds() / 60
+        chiller_delta = self.config.chiller_target(target) - self.config.chiller_target(next_target)
+        ramp = chiller_delta / self.estimator.rate
+        if remaining <= 0 or remaining >= ramp + self.margin:
+            self.active.discard(fermenter_id)
+            return target
+
+        if fermenter_id not in self.active:
+            self.active.add(fermenter_id)
+            logger.info("[CHILLER] [PRECOOL] Preenfriando %s para el paso a %.1f°C (%.0f min antes)",
+                        fermenter_id, next_target, remaining)
+
+        fraction = 1.0 if ramp <= 0 else min(1.0, (ramp + self.margin - remaining) / ramp)
+        # Se redondea para no reevaluar el control en cada lectura durante la rampa
+        return round(target - (target - next_target) * fraction, 1)
+
+    def _plan(self, fermenter_id, fermenter):
+        steps = getattr(fermenter, "steps", None) or []
+        cached = self.plans.get(fermenter_id)
+        if cached is not None:
+            index, step, endtime, plan = cached
+            if index < len(steps) and steps[index] is step and _status(step) == "A" and getattr(step, "endtime", 0) == endtime:
+                return plan
+
+        plan = None
+        for index, step in enumerate(steps):
+            if _status(step) != "A":
+                continue
+            endtime = getattr(step, "endtime", 0) or 0
+            following = next((s for s in steps[index + 1:] if _status(s) == "I"), None)
+            next_target = _step_temp(following) if following is not None else None
+            if endtime and next_target is not None:
+                plan = (datetime.fromtimestamp(endtime), next_target)
+            self.plans[fermenter_id] = (index, step, getattr(step, "endtime", 0), plan)
+            return plan
+
+        self.plans.pop(fermenter_id, None)
+        return None
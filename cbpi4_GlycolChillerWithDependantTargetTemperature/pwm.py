@@ -0,0 +1,148 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUTY_CURVES = {
+    "Linear": lambda x: x,
+    "Quadratic": lambda x: x * x,
+    "SquareRoot": lambda x: x ** 0.5,
+}
+
+
+def phase_durations(duty, cycle_seconds, min_seconds):
+    """Tiempos ON/OFF de un ciclo respetando los mínimos de cada fase."""
+    on_seconds = max(cycle_seconds * duty, min_seconds)
+    off_seconds = max(cycle_seconds * (1 - duty), min_seconds)
+
+    # Ajustar si al aplicar mínimos se supera el total del ciclo
+    if on_seconds + off_seconds > cycle_seconds:
+        overflow = (on_seconds + off_seconds) - cycle_seconds
+        if on_seconds > off_seconds:
+            on_seconds -= overflow
+        else:
+            off_seconds -= overflow
+
+    return on_seconds, off_seconds
+
+
+class PwmChannel:
+    """Canal PWM de un actuador, conmutado en plazos exactos con ``call_at``.
+
+    El duty se puede cambiar en cualquier momento y se aplica en el siguiente
+    cambio de fase. Con duty ``None`` el canal se detiene y el actuador se
+    apaga. Parar y volver a arrancar también respeta ``min_seconds``: el
+    apagado y la primera fase esperan a que la fase en curso cumpla el mínimo.
+    """
+
+    def __init__(self, actor, switch, cycle_seconds=120, min_seconds=5, curve="Linear", name="ACTUATOR"):
+        self.actor = actor
+        self.switch = switch
+        self.name = name
+        self.duty = None
+        self.state = False
+        self.deadline = None
+        self.handle = None
+        self.last_switch = None
+        self.configure(cycle_seconds, min_seconds, curve)
+
+    def configure(self, cycle_seconds=120, min_seconds=5, curve="Linear"):
+        # Se aplica en el siguiente cambio de fase
+        self.cycle_seconds = cycle_seconds
+        self.min_seconds = min_seconds
+        self.curve = DUTY_CURVES.get(curve, DUTY_CURVES["Linear"])
+
+    def set_duty(self, duty):
+        if duty is not None:
+            duty = self.curve(min(max(duty, 0.0), 1.0))
+
+        previous, self.duty = self.duty, duty
+        if duty is None and previous is not None:
+            self.stop()
+            if self.state:
+                self._schedule(self._earliest_switch())
+        elif duty is not None and self.handle is None:
+            self._schedule(self._earliest_switch())
+        elif duty is not None and previous is None:
+            # Se reanuda antes del apagado diferido: continúa la fase ON en curso
+            self.stop()
+            on_seconds, _ = phase_durations(duty, self.cycle_seconds, self.min_seconds)
+            self._schedule(max(self._earliest_switch(), self.last_switch + on_seconds))
+
+    def stop(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+    def _earliest_switch(self):
+        now = asyncio.get_event_loop().time()
+        if self.last_switch is None:
+            return now
+        return max(now, self.last_switch + self.min_seconds)
+
+    def _schedule(self, when):
+        self.deadline = when
+        self.handle = asyncio.get_event_loop().call_at(when, self._on_deadline)
+
+    def _on_deadline(self):
+        self.handle = None
+        if self.duty is None:
+            # Apagado diferido tras parar el canal
+            self._switch(False)
+            return
+
+        on_seconds, off_seconds = phase_durations(self.duty, self.cycle_seconds, self.min_seconds)
+        turn_on = not self.state
+        self._switch(turn_on)
+
+        # El siguiente plazo se calcula desde el anterior para no acumular deriva,
+        # salvo que el bucle se haya detenido: las fases vencidas no se recuperan
+        now = asyncio.get_event_loop().time()
+        self.deadline = max(self.deadline, now) + (on_seconds if turn_on else off_seconds)
+        logger.debug("[CHILLER] [%s] Duty: %.2f | ON: %.1f s | OFF: %.1f s", self.name, self.duty, on_seconds, off_seconds)
+        self._schedule(self.deadline)
+
+    def _switch(self, on):
+        if on == self.state:
+            return
+        self.state = on
+        self.last_switch = asyncio.get_event_loop().time()
+        logger.info("[CHILLER] [%s] %s", self.name, "ENCENDIDO" if on else "APAGADO")
+        asyncio.ensure_future(self.switch(self.actor, on))
+
+
+class PwmScheduler:
+    """Motor PWM con un canal independiente por actuador.
+
+    ``name`` es la etiqueta de log del canal (``[CHILLER] [<name>]``).
+    """
+
+    def __init__(self, switch):
+        self.switch = switch
+        self.channels = {}
+
+    def add(self, actor, **options):
+        if actor is None:
+            return None
+        channel = self.channels.get(actor)
+        if channel is None:
+            channel = PwmChannel(actor, self.switch, **options)
+            self.channels[actor] = channel
+        else:
+            channel.name = options.pop("name", channel.name)
+            channel.configure(**options)
+        return channel
+
+    def remove(self, actor):
+        channel = self.channels.pop(actor, None)
+        if channel is not None:
+            channel.set_duty(None)
+
+    def set_duty(self, actor, duty):
+        channel = self.channels.get(actor)
+        if channel is not None:
+            channel.set_duty(duty)
+
+    def stop(self):
+        for channel in self.channels.values():
+            channel.stop()
@@ -0,0 +1,83 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+FAIL_SAFE_MODES = ["Off", "Duty"]
+
+
+class SensorFilter:
+    """Etapa de entrada de un sensor: mediana, EMA, límite de ritmo y caducidad.
+
+    Las últimas ``window`` lecturas válidas se guardan en un anillo de
+    tamaño fijo; de su mediana se hace una media móvil exponencial
+    (``alpha`` = 1 la desactiva) y el resultado no puede moverse más de
+    ``max_rate`` °C/min (0 = sin límite). El sensor se considera en fallo
+    si no da lecturas válidas durante ``stale_after`` segundos o si la
+    lectura no cambia en absoluto durante ``frozen_after`` segundos
+    (0 = sin detección).
+    """
+
+    def __init__(self, name, clock, window=5, alpha=0.5, max_rate=0.0, stale_after=120, frozen_after=3600):
+        self.name = name
+        self.clock = clock
+        self.window = max(int(window), 1)
+        self.alpha = alpha
+        self.max_rate = max_rate
+        self.stale_after = stale_after
+        self.frozen_after = frozen_after
+        self.ring = [0.0] * self.window
+        self.size = 0
+        self.index = 0
+        self.value = None
+        self.updated = None
+        self.last_raw = None
+        self.last_change = None
+        self.last_valid = None
+        self.faulted = False
+
+    def update(self, raw):
+        now = self.clock.monotonic()
+        if self.last_valid is None:
+            # El plazo de caducidad cuenta desde la primera lectura
+            self.last_valid = self.last_change = now
+
+        if raw is not None:
+            self.last_valid = now
+            if raw != self.last_raw:
+                self.last_raw = raw
+                self.last_change = now
+            self._filter(raw, now)
+
+        self._check_stale(now)
+        return self.value
+
+    def _filter(self, raw, now):
+        self.ring[self.index] = raw
+        self.index = (self.index + 1) % self.window
+        self.size = min(self.size + 1, self.window)
+        window = sorted(self.ring[:self.size])
+        median = window[self.size // 2] if self.size % 2 else (window[self.size // 2 - 1] + window[self.size // 2]) / 2
+
+        if self.value is None:
+            self.value, self.updated = median, now
+            return
+        value = self.value + self.alpha * (median - self.value)
+        if self.max_rate > 0:
+            step = self.max_rate * (now - self.updated) / 60
+            value = min(max(value, self.value - step), self.value + step)
+        self.value, self.updated = value, now
+
+    def _check_stale(self, now):
+        stale = bool(self.stale_after) and now - self.last_valid >= self.stale_after
+        frozen = bool(self.frozen_after) and now - self.last_change >= self.frozen_after
+        faulted = stale or frozen
+        if faulted != self.faulted:
+            self.faulted = faulted
+            if stale:
+                logger.warning("[CHILLER] [SENSOR] %s sin lecturas desde hace %.0f s; sensor en fallo",
+                               self.name, now - self.last_valid)
+            elif frozen:
+                logger.warning("[CHILLER] [SENSOR] %s con el mismo valor desde hace %.0f s; sensor en fallo",
+                               self.name, now - self.last_change)
+            else:
+                logger.warning("[CHILLER] [SENSOR] %s vuelve a dar lecturas", self.name)
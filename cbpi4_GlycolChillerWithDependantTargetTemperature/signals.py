@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+
+from .clock import SystemClock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIGNAL_PATH = "/home/cbpi/fermenter_action_required.txt"
+
+
+def parse_signal(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+class SignalSource:
+    """Fuente de la señal "action required" con valor cacheado.
+
+    Las subclases actualizan el valor con ``_store()``. ``get()`` devuelve el
+    último valor mientras no supere ``max_age`` segundos; si está caducado o
+    nunca se ha leído se considera que no hace falta actuar.
+    """
+
+    def __init__(self, max_age=None, clock=None):
+        self.max_age = max_age
+        self.clock = clock or SystemClock()
+        self.value = None
+        self.updated = None
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def refresh(self):
+        pass
+
+    async def get(self):
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("[CHILLER] [ACTUATOR] Error al actualizar la señal de acción")
+
+        if self.updated is None:
+            return False
+        if self.max_age and self.clock.monotonic() - self.updated > self.max_age:
+            logger.warning("[CHILLER] [ACTUATOR] Señal de acción caducada (%.0f s)", self.clock.monotonic() - self.updated)
+            return False
+        return self.value
+
+    def _store(self, value):
+        value = parse_signal(value)
+        if value != self.value:
+            logger.debug("[CHILLER] [ACTUATOR] Action Required leido: %s", value)
+        self.value = value
+        self.updated = self.clock.monotonic()
+
+    def _clear(self):
+        # Sin señal disponible: equivale a no actuar
+        self.value = None
+        self.updated = None
+
+
+class FileSignalSource(SignalSource):
+    """Lee la señal de un fichero solo cuando cambia su mtime.
+
+    ``stat`` y la lectura se hacen en el executor para no bloquear el bucle,
+    y como mucho una vez cada ``check_interval`` segundos.
+    """
+
+    def __init__(self, path=DEFAULT_SIGNAL_PATH, max_age=None, check_interval=5, clock=None):
+        super().__init__(max_age, clock)
+        self.path = path
+        self.check_interval = check_interval
+        self.mtime = None
+        self.last_check = None
+        self.missing = False
+
+    async def refresh(self):
+        now = self.clock.monotonic()
+        if self.last_check is not None and now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+
+        loop = asyncio.get_event_loop()
+        try:
+            value = await loop.run_in_executor(None, self._read_if_changed)
+        except OSError as e:
+            logger.warning("[CHILLER] [ACTUATOR] No se pudo leer el archivo de estado: %s", e)
+            self.mtime = None
+            self._clear()
+            return
+
+        if self.missing:
+            self._clear()
+        elif value is not None:
+            self._store(value)
+        elif self.mtime is not None:
+            # Sin cambios: el valor cacheado sigue vigente
+            self.updated = now
+
+    def _read_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            if not self.missing:
+                logger.warning("[CHILLER] [ACTUATOR] Archivo de estado no encontrado.")
+            self.missing = True
+            self.mtime = None
+            return None
+
+        self.missing = False
+
+        if mtime == self.mtime:
+            return None
+
+        with open(self.path, "r") as f:
+            value = f.read().strip()
+        self.mtime = mtime
+        return value
+
+
+class ConfigSignalSource(SignalSource):
+    """Lee la señal de un parámetro de configuración de CBPi."""
+
+    def __init__(self, cbpi, key, max_age=None, clock=None):
+        super().__init__(max_age, clock)
+        self.cbpi = cbpi
+        self.key = key
+
+    async def refresh(self):
+        value = self.cbpi.config.get(self.key, None)
+        if value is not None:
+            self._store(value)
+
+
+class MqttSignalSource(SignalSource):
+    """Recibe la señal de un topic MQTT a través del satélite de CBPi."""
+
+    def __init__(self, cbpi, topic, max_age=None, clock=None):
+        super().__init__(max_age, clock)
+        self.cbpi = cbpi
+        self.topic = topic
+        self.subscribed = False
+
+    async def start(self):
+        satellite = getattr(self.cbpi, "satellite", None)
+        if satellite is None:
+            logger.error("[CHILLER] [ACTUATOR] MQTT no está habilitado en CBPi; la señal de acción no se recibirá")
+            return
+        self.subscribed = bool(satellite.subscribe(self.topic, self.on_message))
+
+    async def stop(self):
+        satellite = getattr(self.cbpi, "satellite", None)
+        if satellite is not None and self.subscribed:
+            satellite.unsubscribe(self.topic, self.on_message)
+            self.subscribed = False
+
+    async def on_message(self, message):
+        # El satélite entrega un ``Message`` de aiomqtt; el valor va en ``payload``
+        payload = getattr(message, "payload", message)
+        try:
+            self._store(payload.decode() if isinstance(payload, (bytes, bytearray)) else payload)
+        except Exception:
+            logger.exception("[CHILLER] [ACTUATOR] Mensaje MQTT de señal inválido")
+
+
+def create_signal_source(cbpi, kind, target=None, max_age=None, clock=None):
+    kind = (kind or "File").lower()
+    if kind == "config":
+        return ConfigSignalSource(cbpi, target or "fermenter_action_required", max_age, clock)
+    if kind == "mqtt":
+        return MqttSignalSource(cbpi, target or "cbpi/fermenter_action_required", max_age, clock)
+    return FileSignalSource(target or DEFAULT_SIGNAL_PATH, max_age, clock=clock)
@@ -0,0 +1,236 @@
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+def parse_compressor_list(text):
+    """Convierte ``"actor3 min=-10 max=5 off=25 run=180; actor4 max=0"`` en opciones por compresor.
+
+    Claves: ``min``/``max`` (ventana de objetivo, °C), ``on``/``off``
+    (tiempo mínimo encendido/apagado, minutos) y ``run`` (tiempo máximo de
+    marcha, minutos).
+    """
+    compressors = []
+    for item in (text or "").split(";"):
+        tokens = item.split()
+        if not tokens:
+            continue
+        options = {"actor": tokens[0]}
+        for token in tokens[1:]:
+            key, _, value = token.partition("=")
+            options[key.strip()] = float(value)
+        compressors.append(options)
+    return compressors
+
+
+class CompressorStage:
+    """Un compresor con su ventana de objetivo y sus límites de tiempo."""
+
+    def __init__(self, actor, tag, min_target=float("-inf"), max_target=float("inf"),
+                 min_on=0, min_off=0, max_run=0):
+        self.actor = actor
+        # Etiqueta de log; se mantienen las históricas (COMPRESSOR1, COMP2)
+        self.tag = tag
+        self.min_target = min_target
+        self.max_target = max_target
+        self.min_on = timedelta(minutes=min_on)
+        self.min_off = timedelta(minutes=min_off)
+        self.max_run = timedelta(minutes=max_run) if max_run else None
+        self.is_on = False
+        self.last_on = None
+        self.last_off = None
+        self.runtime = timedelta(0)
+        self.starts = 0
+
+    def in_window(self, target_temp):
+        return self.min_target <= target_temp <= self.max_target
+
+    def can_start(self, now):
+        return self.last_off is None or now - self.last_off >= self.min_off
+
+    def on_time(self, now):
+        return now - self.last_on if self.is_on and self.last_on is not None else timedelta(0)
+
+    def total_runtime(self, now):
+        return self.runtime + self.on_time(now)
+
+    def snapshot(self):
+        return {
+            "is_on": self.is_on,
+            "last_on": self.last_on.isoformat() if self.last_on else None,
+            "last_off": self.last_off.isoformat() if self.last_off else None,
+            "runtime": self.runtime.total_seconds(),
+            "starts": self.starts,
+        }
+
+    def restore(self, data, actual, now):
+        """Restaura una instantánea y la concilia con el estado real del actor.
+
+        Ante la duda se elige la opción conservadora: si el compresor estaba
+        encendido y ya no lo está, el tiempo mínimo apagado cuenta desde ahora.
+        """
+        parse = lambda value: datetime.fromisoformat(value) if value else None
+        self.last_on = parse(data.get("last_on"))
+        self.last_off = parse(data.get("last_off"))
+        self.runtime = timedelta(seconds=data.get("runtime", 0))
+        self.starts = data.get("starts", 0)
+        was_on = bool(data.get("is_on"))
+
+        if was_on and actual:
+            self.is_on = True
+        elif was_on:
+            self.runtime += max(now - self.last_on, timedelta(0)) if self.last_on else timedelta(0)
+            self.is_on = False
+            self.last_off = now
+        elif actual:
+            self.is_on = True
+            self.last_on = now
+        else:
+            self.is_on = False
+
+    def switch(self, on, now):
+        if on:
+            self.last_on = now
+            self.starts += 1
+        else:
+            self.runtime += self.on_time(now)
+            self.last_off = now
+        self.is_on = on
+
+
+class StagingEngine:
+    """Escalonamiento de N compresores con rotación lead/lag.
+
+    Los compresores arrancan por histéresis en orden de menor tiempo de
+    marcha acumulado, para repartir el desgaste. Con ``pulldown_rate`` > 0
+    solo se añade una etapa más si, pasados ``stage_delay`` minutos desde
+    el último cambio, la temperatura baja más despacio que ese ritmo
+    (°C/min); con 0 arrancan a la vez todas las etapas disponibles.
+    ``decide()`` devuelve la lista de cambios ``(etapa, encender, motivo)``.
+    """
+
+    def __init__(self, stages, offset_on=1, offset_off=1, pulldown_rate=0, stage_delay=5):
+        self.stages = stages
+        self.offset_on = offset_on
+        self.offset_off = offset_off
+        self.pulldown_rate = pulldown_rate
+        self.stage_delay = timedelta(minutes=stage_delay)
+        self.reference_time = None
+        self.reference_temp = None
+
+    def reconfigure(self, stages, offset_on, offset_off, pulldown_rate, stage_delay):
+        """Sustituye la configuración conservando el estado de los compresores que siguen.
+
+        Devuelve las etapas eliminadas que estaban encendidas, para apagarlas.
+        """
+        previous = {stage.actor: stage for stage in self.stages}
+        for stage in stages:
+            old = previous.pop(stage.actor, None)
+            if old is not None:
+                stage.is_on, stage.last_on, stage.last_off = old.is_on, old.last_on, old.last_off
+                stage.runtime, stage.starts = old.runtime, old.starts
+
+        self.stages = stages
+        self.offset_on = offset_on
+        self.offset_off = offset_off
+        self.pulldown_rate = pulldown_rate
+        self.stage_delay = timedelta(minutes=stage_delay)
+        return [stage for stage in previous.values() if stage.is_on]
+
+    def decide(self, current_temp, target_temp, now):
+        changes = []
+
+        for stage in self.stages:
+            if not stage.is_on:
+                continue
+            if not stage.in_window(target_temp):
+                changes.append((stage, False, "rango"))
+            elif stage.max_run is not None and stage.on_time(now) >= stage.max_run:
+                changes.append((stage, False, "tiempo máximo"))
+            elif current_temp <= target_temp - self.offset_off and stage.on_time(now) >= stage.min_on:
+                changes.append((stage, False, "histéresis"))
+
+        for stage, _, _ in changes:
+            stage.switch(False, now)
+
+        if current_temp >= target_temp + self.offset_on:
+            running = any(stage.is_on for stage in self.stages)
+            candidates = sorted(
+                (stage for stage in self.stages
+                 if not stage.is_on and stage.in_window(target_temp) and stage.can_start(now)),
+                key=lambda stage: stage.total_runtime(now),
+            )
+            for stage in candidates:
+                if running and not self._needs_stage(current_temp, now):
+                    break
+                stage.switch(True, now)
+                changes.append((stage, True, "escalonamiento" if running else "histéresis"))
+                if self.pulldown_rate > 0:
+                    running = True
+                    self._reset_reference(current_temp, now)
+
+        if changes:
+            self._reset_reference(current_temp, now)
+        return changes
+
+    def force(self, actors, now, reason):
+        """Deja encendidas solo las etapas de ``actors`` (modo de seguridad).
+
+        Los apagados son inmediatos; los arranques respetan el tiempo
+        mínimo apagado.
+        """
+        changes = []
+        for stage in self.stages:
+            on = stage.actor in actors
+            if on == stage.is_on or (on and not stage.can_start(now)):
+                continue
+            stage.switch(on, now)
+            changes.append((stage, on, reason))
+        if changes:
+            self.reference_time = None
+        return changes
+
+    def next_deadline(self, now):
+        """Próximo instante en el que una regla temporal puede cambiar una decisión."""
+        deadlines = []
+        for stage in self.stages:
+            if stage.is_on:
+                if stage.max_run is not None:
+                    deadlines.append(stage.last_on + stage.max_run)
+                if stage.min_on:
+                    deadlines.append(stage.last_on + stage.min_on)
+            elif stage.last_off is not None and stage.min_off:
+                deadlines.append(stage.last_off + stage.min_off)
+        if self.pulldown_rate > 0 and self.reference_time is not None:
+            deadlines.append(self.reference_time + self.stage_delay)
+
+        upcoming = [deadline for deadline in deadlines if deadline > now]
+        return min(upcoming) if upcoming else None
+
+    def snapshot(self):
+        return {stage.actor: stage.snapshot() for stage in self.stages}
+
+    def restore(self, snapshot, actual_state, now):
+        for stage in self.stages:
+            data = snapshot.get(stage.actor)
+            if data is not None:
+                stage.restore(data, actual_state(stage.actor), now)
+                logger.info("[CHILLER] [%s] Estado restaurado: %s | último apagado: %s",
+                            stage.tag, "ENCENDIDO" if stage.is_on else "APAGADO", stage.last_off)
+
+    def _needs_stage(self, current_temp, now):
+        if self.pulldown_rate <= 0:
+            return True
+        if self.reference_time is None:
+            return True
+        elapsed = now - self.reference_time
+        if elapsed < self.stage_delay:
+            return False
+        rate = (self.reference_temp - current_temp) / (elapsed.total_seconds() / 60)
+        logger.debug("[CHILLER] [STAGING] Ritmo de bajada: %.3f °C/min (mínimo %s)", rate, self.pulldown_rate)
+        return rate < self.pulldown_rate
+
+    def _reset_reference(self, current_temp, now):
+        self.reference_time = now
+        self.reference_temp = current_temp
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+
+
+def default_file_path(cbpi, filename):
+    """Ruta de un fichero del plugin en la carpeta de configuración de CBPi (o en ``~``)."""
+    try:
+        return cbpi.config_folder.get_file_path(filename)
+    except Exception:
+        return os.path.join(os.path.expanduser("~"), filename)
+
+
+class StateStore:
+    """Instantánea compacta del estado del controlador en disco.
+
+    Las escrituras son atómicas (fichero temporal + fsync + ``os.replace``),
+    se hacen fuera del bucle de eventos y se agrupan: si llegan varias
+    instantáneas mientras se escribe, solo se guarda la última.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = None
+        self.writer = None
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception("[CHILLER] [STATE] Estado guardado ilegible en %s; se ignora", self.path)
+            return None
+
+        if data.get("version") != STATE_VERSION:
+            logger.warning("[CHILLER] [STATE] Versión de estado %s no soportada; se ignora", data.get("version"))
+            return None
+        return data
+
+    def save(self, snapshot):
+        snapshot = dict(snapshot, version=STATE_VERSION)
+        self.pending = snapshot
+        if self.writer is None or self.writer.done():
+            self.writer = asyncio.ensure_future(self._drain())
+
+    async def flush(self):
+        if self.writer is not None:
+            await self.writer
+
+    async def _drain(self):
+        loop = asyncio.get_event_loop()
+        while self.pending is not None:
+            snapshot, self.pending = self.pending, None
+            try:
+                await loop.run_in_executor(None, self._write, snapshot)
+            except Exception:
+                logger.exception("[CHILLER] [STATE] No se pudo guardar el estado en %s", self.path)
+
+    def _write(self, snapshot):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # fsync del directorio para que el rename sobreviva a un corte de luz
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
@@ -0,0 +1,106 @@
+import heapq
+
+AGGREGATION_POLICIES = ["Min", "Weighted", "Demand"]
+
+
+def parse_fermenter_list(text):
+    """Convierte ``"id1:2, id2"`` en ``[("id1", 2.0), ("id2", 1.0)]``."""
+    fermenters = []
+    for item in (text or "").replace(";", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        fermenter_id, _, weight = item.partition(":")
+        fermenters.append((fermenter_id.strip(), float(weight) if weight.strip() else 1.0))
+    return fermenters
+
+
+class TargetAggregator:
+    """Objetivo agregado de N fermentadores, mantenido de forma incremental.
+
+    - ``Min``: el objetivo más bajo (montículo por objetivo).
+    - ``Weighted``: media ponderada (sumas acumuladas).
+    - ``Demand``: el objetivo del fermentador con más demanda de frío,
+      es decir, con mayor ``temperatura - objetivo`` (montículo por demanda).
+
+    ``update()`` cuesta O(log N); los montículos usan borrado perezoso y se
+    compactan cuando acumulan demasiadas entradas obsoletas.
+    """
+
+    def __init__(self, policy="Min", weights=None):
+        self.policy = policy if policy in AGGREGATION_POLICIES else "Min"
+        self.weights = weights or {}
+        self.entries = {}
+        self.heap = []
+        self.version = 0
+        self.weight_sum = 0.0
+        self.weighted_sum = 0.0
+
+    def update(self, fermenter, target, temp=None):
+        if target is None:
+            self.remove(fermenter)
+            return
+
+        previous = self.entries.get(fermenter)
+        if previous is not None and previous[0] == target and (self.policy != "Demand" or previous[1] == temp):
+            return
+
+        self._discount(fermenter)
+        self.version += 1
+        self.entries[fermenter] = (target, temp, self.version)
+
+        weight = self.weights.get(fermenter, 1.0)
+        self.weight_sum += weight
+        self.weighted_sum += weight * target
+
+        if self.version % 1000 == 0:
+            # Evita la deriva numérica de las sumas acumuladas
+            self._resum()
+
+        if self.policy != "Weighted":
+            heapq.heappush(self.heap, (self._key(target, temp), self.version, fermenter))
+            if len(self.heap) > 2 * len(self.entries) + 16:
+                self._compact()
+
+    def remove(self, fermenter):
+        self._discount(fermenter)
+        self.entries.pop(fermenter, None)
+
+    @property
+    def value(self):
+        if not self.entries:
+            return None
+
+        if self.policy == "Weighted":
+            return self.weighted_sum / self.weight_sum if self.weight_sum else None
+
+        while self.heap:
+            _, version, fermenter = self.heap[0]
+            entry = self.entries.get(fermenter)
+            if entry is not None and entry[2] == version:
+                return entry[0]
+            heapq.heappop(self.heap)
+        return None
+
+    def _key(self, target, temp):
+        if self.policy == "Demand":
+            demand = 0.0 if temp is None else temp - target
+            # Mayor demanda primero; a igual demanda, el objetivo más bajo
+            return (-demand, target)
+        return target
+
+    def _discount(self, fermenter):
+        entry = self.entries.get(fermenter)
+        if entry is not None:
+            weight = self.weights.get(fermenter, 1.0)
+            self.weight_sum -= weight
+            self.weighted_sum -= weight * entry[0]
+
+    def _resum(self):
+        self.weight_sum = sum(self.weights.get(f, 1.0) for f in self.entries)
+        self.weighted_sum = sum(self.weights.get(f, 1.0) * e[0] for f, e in self.entries.items())
+
+    def _compact(self):
+        self.heap = [item for item in self.heap
+                     if self.entries.get(item[2], (None, None, None))[2] == item[1]]
+        heapq.heapify(self.heap)
@@ -0,0 +1,210 @@
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_VERSION = 1
+HEADER = struct.Struct("<4sHHIQQ")
+HEADER_SIZE = 32
+MAGIC = b"GCTL"
+# Instante (s epoch), temp. chiller, objetivo chiller, objetivo fermentador y bits de estado
+RECORD = struct.Struct("<dfffHxx")
+ACTUATOR_BIT = 15
+# Segundos entre registros
+SAMPLE_INTERVAL = 1
+# Temperatura registrada sin lectura válida (sensor en fallo); query() la omite
+NO_READING = float("nan")
+# Registros más antiguos que no se leen desde otro hilo: pueden estar sobrescribiéndose
+READ_MARGIN = 64
+
+# Instancias en marcha: id del fermentador → TelemetryRing
+TELEMETRY = {}
+
+
+def state_bits(stages, actuator_on):
+    """Bit i = etapa i encendida (en el orden del escalonamiento); bit 15 = actuador."""
+    bits = 0
+    for index, stage in enumerate(stages[:ACTUATOR_BIT]):
+        if stage.is_on:
+            bits |= 1 << index
+    if actuator_on:
+        bits |= 1 << ACTUATOR_BIT
+    return bits
+
+
+class TelemetryRing:
+    """Anillo de registros fijos en un fichero proyectado en memoria.
+
+    Cada ``append()`` escribe 24 bytes en el mapa, sin llamadas al sistema;
+    el kernel vuelca las páginas y ``flush()`` fuerza el volcado de vez en
+    cuando. El fichero sobrevive a los reinicios: al abrirlo se continúa
+    donde se quedó. Si la capacidad cambia el fichero se recrea.
+    Las consultas buscan el rango por bisección y reducen los puntos
+    agrupando registros consecutivos. Para que la bisección sea válida los
+    instantes nunca decrecen: si el reloj de pared salta hacia atrás, los
+    registros repiten el último instante hasta que lo alcanza. Las consultas
+    (desde otro hilo) y ``close()`` se excluyen con un cerrojo; tras cerrar,
+    ``query()`` devuelve una lista vacía.
+    """
+
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = int(capacity)
+        if self.capacity < 1:
+            raise ValueError(f"Capacidad de telemetría inválida: {capacity}")
+        self.head = 0
+        self.count = 0
+        self.last_time = None
+        self.clock_behind = False
+        self.file = None
+        self.map = None
+        self.lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        size = HEADER_SIZE + self.capacity * RECORD.size
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.file = os.fdopen(fd, "r+b")
+
+        header = self.file.read(HEADER.size)
+        valid = False
+        if len(header) == HEADER.size:
+            magic, version, record_size, capacity, head, count = HEADER.unpack(header)
+            valid = (magic, version, record_size, capacity) == (MAGIC, TELEMETRY_VERSION, RECORD.size, self.capacity)
+            if valid:
+                self.head, self.count = head % self.capacity, min(count, self.capacity)
+            else:
+                logger.warning("[CHILLER] [TELEMETRY] Formato o capacidad distintos en %s; se recrea", self.path)
+
+        if not valid:
+            self.file.truncate(0)
+        # Fichero disperso: solo ocupa disco lo que se escribe
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self._write_header()
+        if self.count:
+            self.last_time = self._record(self.count - 1)[0]
+
+    def close(self):
+        # Espera a la consulta en curso: no se puede desproyectar el mapa bajo sus pies
+        with self.lock:
+            if self.map is not None:
+                self.map.flush()
+                self.map.close()
+                self.map = None
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def flush(self):
+        # Se llama desde el ejecutor: mismo cerrojo que close()
+        with self.lock:
+            if self.map is not None:
+                self.map.flush()
+
+    def append(self, timestamp, chiller_temp, chiller_target, fermenter_target, bits):
+        if self.last_time is not None and timestamp < self.last_time:
+            if self.last_time - timestamp > SAMPLE_INTERVAL and not self.clock_behind:
+                logger.warning("[CHILLER] [TELEMETRY] El reloj ha retrocedido %.0f s; se mantiene el último instante",
+                               self.last_time - timestamp)
+            self.clock_behind = True
+            timestamp = self.last_time
+        else:
+            self.clock_behind = False
+        RECORD.pack_into(self.map, HEADER_SIZE + self.head * RECORD.size,
+                         timestamp, chiller_temp, chiller_target, fermenter_target, bits)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.last_time = timestamp
+        self._write_header()
+
+    def view(self):
+        """Posición actual, para consultar desde otro hilo sin leer registros a medio escribir."""
+        return self.head, self.count
+
+    def query(self, start=None, end=None, points=1000, view=None):
+        """Registros entre ``start`` y ``end`` (s epoch), reducidos a ``points`` como mucho.
+
+        Cada punto es la media de un grupo de registros consecutivos; los
+        estados se devuelven como fracción de tiempo encendido por bit. Las
+        temperaturas sin lectura (NaN) no cuentan en la media y un grupo sin
+        ninguna válida da ``None``: NaN no es JSON válido.
+        """
+        with self.lock:
+            if self.map is None:
+                return []
+            return self._query(start, end, points, view)
+
+    def _query(self, start, end, points, view):
+        head, count = view or self.view()
+        skip = READ_MARGIN if view is not None and count == self.capacity else 0
+        oldest = (head - count) % self.capacity
+        index = lambda i: (oldest + skip + i) % self.capacity
+        total = count - skip
+        if total <= 0:
+            return []
+
+        times = _TimeIndex(self, index)
+        first = 0 if start is None else bisect_left(times, start, 0, total)
+        last = total if end is None else bisect_right(times, end, first, total)
+        selected = last - first
+        if selected <= 0:
+            return []
+
+        group = max(1, -(-selected // max(int(points), 1)))
+        result = []
+        for group_start in range(first, last, group):
+            group_end = min(group_start + group, last)
+            sums = [0.0, 0.0, 0.0, 0.0]
+            valid = [0, 0, 0, 0]
+            on = [0] * (ACTUATOR_BIT + 1)
+            for i in range(group_start, group_end):
+                record = self._record_at(index(i))
+                for field in range(4):
+                    if math.isfinite(record[field]):
+                        sums[field] += record[field]
+                        valid[field] += 1
+                bits = record[4]
+                while bits:
+                    low = bits & -bits
+                    on[low.bit_length() - 1] += 1
+                    bits ^= low
+            n = group_end - group_start
+            mean = [total / valid[field] if valid[field] else None for field, total in enumerate(sums)]
+            result.append({
+                "time": mean[0],
+                "chiller_temp": mean[1],
+                "chiller_target": mean[2],
+                "fermenter_target": mean[3],
+                "stages": [value / n for value in on[:ACTUATOR_BIT]],
+                "actuator": on[ACTUATOR_BIT] / n,
+            })
+        return result
+
+    def _record(self, offset):
+        # offset lógico desde el registro más antiguo
+        return self._record_at((self.head - self.count + offset) % self.capacity)
+
+    def _record_at(self, position):
+        return RECORD.unpack_from(self.map, HEADER_SIZE + position * RECORD.size)
+
+    def _write_header(self):
+        HEADER.pack_into(self.map, 0, MAGIC, TELEMETRY_VERSION, RECORD.size, self.capacity, self.head, self.count)
+
+
+class _TimeIndex:
+    """Secuencia de instantes para ``bisect`` sin copiar los registros."""
+
+    def __init__(self, ring, index):
+        self.ring = ring
+        self.index = index
+
+    def __getitem__(self, i):
+        return self.ring._record_at(self.index(i))[0]
@@ -1,19 +1,61 @@
+import argparse
+import hashlib
+import json
 import os
 import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import paramiko
-from scp import SCPClient
 
 # CONFIGURACIÓN
-raspberry_ip = "192.168.0.35"
-username = "cbpi"
-password = "Fulleravive.13"
-project_root = os.getcwd()
+# Las credenciales y los hosts se leen de un fichero JSON (CBPI_DEPLOY_CONFIG,
+# por defecto ~/.cbpi_deploy.json) y de variables de entorno, que tienen
+# prioridad: CBPI_HOSTS (separados por comas), CBPI_USER, CBPI_PASSWORD,
+# CBPI_KEY_FILE, CBPI_PORT y CBPI_PYTHON.
+DEFAULT_CONFIG = {
+    "hosts": [],
+    "user": "cbpi",
+    "password": None,
+    "key_file": None,
+    "port": 22,
+    "python": "~/.local/pipx/venvs/cbpi4/bin/python",
+    "service": "craftbeerpi.service",
+}
+ENV_KEYS = {
+    "CBPI_HOSTS": "hosts",
+    "CBPI_USER": "user",
+    "CBPI_PASSWORD": "password",
+    "CBPI_KEY_FILE": "key_file",
+    "CBPI_PORT": "port",
+    "CBPI_PYTHON": "python",
+}
+project_root = os.path.dirname(os.path.abspath(__file__))
 plugin_dir = "cbpi4_GlycolChillerWithDependantTargetTemperature"
 plugin_file_path = os.path.join(project_root, plugin_dir, "__init__.py")
 setup_path = os.path.join(project_root, "setup.py")
+dist_dir = os.path.join(project_root, "dist")
+state_path = os.path.join(project_root, ".deploy_state.json")
 remote_tmp_path = "/tmp/cbpi_plugin_deploy"
 original_class_name = "GlycolChillerWithDependantTargetTemperature"
 
+
+def load_config(path=None):
+    config = dict(DEFAULT_CONFIG)
+    path = path or os.environ.get("CBPI_DEPLOY_CONFIG", os.path.expanduser("~/.cbpi_deploy.json"))
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            config.update(json.load(f))
+
+    for env, key in ENV_KEYS.items():
+        if os.environ.get(env):
+            config[key] = os.environ[env]
+    if isinstance(config["hosts"], str):
+        config["hosts"] = [host.strip() for host in config["hosts"].split(",") if host.strip()]
+    config["port"] = int(config["port"])
+    return config
+
 # INCREMENTA LA VERSIÓN EN setup.py
 def bump_version(setup_file):
     with open(setup_file, "r") as f:
@@ -70,39 +112,157 @@ def patch_plugin_class_and_register(version):
 
 
 # CREA CLIENTE SSH
-def create_ssh_client(ip, user, passwd):
+def create_ssh_client(ip, config):
     ssh = paramiko.SSHClient()
     ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    ssh.connect(ip, username=user, password=passwd)
+    ssh.connect(ip, port=config["port"], username=config["user"], password=config["password"],
+                key_filename=config["key_file"], timeout=15)
     return ssh
 
-# DESPLIEGA EL PLUGIN
-def deploy():
-    version = bump_version(setup_path)
-    new_class, plugin_name = patch_plugin_class_and_register(version)
-    ssh = create_ssh_client(raspberry_ip, username, password)
 
-    print(f"🧹 Borrando carpeta temporal previa: {remote_tmp_path}")
-    ssh.exec_command(f"rm -rf {remote_tmp_path} && mkdir -p {remote_tmp_path}")
+def run(ssh, command):
+    stdin, stdout, stderr = ssh.exec_command(command)
+    status = stdout.channel.recv_exit_status()
+    return status, stdout.read().decode(), stderr.read().decode()
+
+
+# HUELLAS PARA EL DESPLIEGUE INCREMENTAL
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_digest():
+    """Huella del código que entra en el wheel (paquete, setup.py y MANIFEST.in)."""
+    paths = [setup_path, os.path.join(project_root, "MANIFEST.in")]
+    for root, dirs, files in os.walk(os.path.join(project_root, plugin_dir)):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        paths += [os.path.join(root, name) for name in sorted(files) if not name.endswith(".pyc")]
+
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            digest.update(os.path.relpath(path, project_root).encode())
+            digest.update(file_sha256(path).encode())
+    return digest.hexdigest()
+
+
+def load_state():
+    try:
+        with open(state_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    with open(state_path, "w") as f:
+        json.dump(state, f, indent=2)
 
-    print("📤 Subiendo el plugin completo a la Raspberry Pi...")
-    with SCPClient(ssh.get_transport()) as scp:
-        for item in os.listdir(project_root):
-            if item.startswith(".") or item == "deploy_plugin.py":
-                continue
-            scp.put(os.path.join(project_root, item), remote_path=remote_tmp_path, recursive=True)
 
-    print("💾 Instalando plugin con pip del entorno CBPi...")
-    pip_cmd = f"~/.local/pipx/venvs/cbpi4/bin/python -m pip install --force-reinstall {remote_tmp_path}"
-    stdin, stdout, stderr = ssh.exec_command(pip_cmd)
-    print(stdout.read().decode())
-    print(stderr.read().decode())
+# CONSTRUYE EL WHEEL EN LOCAL
+def build_wheel(version):
+    print("🛠️  Construyendo el wheel en local...")
+    subprocess.run([sys.executable, "-m", "pip", "wheel", "--no-deps", "--quiet", "-w", dist_dir, project_root],
+                   check=True)
+    # Según la versión de setuptools el nombre del wheel puede ir en minúsculas
+    expected = f"{plugin_dir}-{version}-py3-none-any.whl"
+    for name in os.listdir(dist_dir):
+        if name.lower() == expected.lower():
+            return os.path.join(dist_dir, name)
+    raise FileNotFoundError(f"No se generó el wheel esperado: {expected}")
 
-    print("🔁 Reiniciando completamente la Raspberry Pi...")
-    ssh.exec_command("sudo reboot")
 
+# DESPLIEGA EN UNA RASPBERRY PI (una sola conexión SSH)
+def deploy_host(host, config, wheel, wheel_sha, force=False):
+    def log(message):
+        print(f"[{host}] {message}")
 
+    try:
+        ssh = create_ssh_client(host, config)
+    except Exception as e:
+        log(f"❌ No se pudo conectar: {e}")
+        return False
+
+    try:
+        run(ssh, f"mkdir -p {remote_tmp_path}")
+        _, deployed, _ = run(ssh, f"cat {remote_tmp_path}/deployed.sha256 2>/dev/null")
+        if deployed.strip() == wheel_sha and not force:
+            log("✅ Ya tiene esta versión instalada; nada que hacer")
+            return True
+
+        remote_wheel = f"{remote_tmp_path}/{os.path.basename(wheel)}"
+        _, remote_sha, _ = run(ssh, f"sha256sum {remote_wheel} 2>/dev/null")
+        if remote_sha.split()[:1] == [wheel_sha]:
+            log("📦 El wheel ya está en la Raspberry Pi; no se vuelve a subir")
+        else:
+            log(f"📤 Subiendo {os.path.basename(wheel)}...")
+            with ssh.open_sftp() as sftp:
+                sftp.put(wheel, remote_wheel)
+
+        log("💾 Instalando el wheel sin dependencias...")
+        status, out, err = run(ssh, f"{config['python']} -m pip install --no-deps --force-reinstall --quiet {remote_wheel}")
+        if status != 0:
+            log(f"❌ Falló pip install:\n{out}{err}")
+            return False
+
+        log(f"🔁 Reiniciando {config['service']}...")
+        status, out, err = run(ssh, f"sudo systemctl restart {config['service']} && systemctl is-active {config['service']}")
+        if status != 0:
+            log(f"❌ El servicio no arrancó:\n{out}{err}")
+            return False
+
+        run(ssh, f"echo {wheel_sha} > {remote_tmp_path}/deployed.sha256")
+        log("✅ Desplegado")
+        return True
+    except Exception as e:
+        log(f"❌ Error: {e}")
+        return False
+    finally:
+        ssh.close()
+
+
+# DESPLIEGA EL PLUGIN
+def deploy(hosts=None, force=False):
+    config = load_config()
+    hosts = hosts or config["hosts"]
+    if not hosts:
+        print("❌ No hay hosts configurados (CBPI_HOSTS o \"hosts\" en el fichero de configuración)")
+        return False
+
+    # Solo se incrementa la versión y se reconstruye si el código cambió desde el último wheel
+    state = load_state()
+    wheel = state.get("wheel")
+    if not force and state.get("source") == source_digest() and wheel and os.path.exists(wheel):
+        version = state["version"]
+        print(f"♻️  Sin cambios desde la v{version}; se reutiliza {os.path.basename(wheel)}")
+    else:
+        version = bump_version(setup_path)
+        patch_plugin_class_and_register(version)
+        wheel = build_wheel(version)
+        save_state({"source": source_digest(), "version": version, "wheel": wheel})
+    plugin_name = f"ChillerDepTemp_v{version.replace('.', '_')}"
+    wheel_sha = file_sha256(wheel)
+
+    print(f"🚀 Desplegando en {len(hosts)} Raspberry Pi: {', '.join(hosts)}")
+    with ThreadPoolExecutor(max_workers=len(hosts)) as pool:
+        results = list(pool.map(lambda host: deploy_host(host, config, wheel, wheel_sha, force), hosts))
+
+    failed = [host for host, ok in zip(hosts, results) if not ok]
+    if failed:
+        print(f"⚠️  Falló el despliegue en: {', '.join(failed)}")
+        return False
     print(f"✅ Plugin desplegado correctamente: {plugin_name} (v{version})")
+    return True
+
 
 if __name__ == "__main__":
-    deploy()
+    parser = argparse.ArgumentParser(description="Despliega el plugin en una o varias Raspberry Pi")
+    parser.add_argument("hosts", nargs="*", help="Hosts de destino (por defecto, los de la configuración)")
+    parser.add_argument("--force", action="store_true",
+                        help="Reconstruye y reinstala aunque no haya cambios")
+    args = parser.parse_args()
+    sys.exit(0 if deploy(args.hosts, args.force) else 1)
@@ -1,57 +1,192 @@
-import paramiko
+import argparse
+import json
+import re
+import shlex
 import sys
+import time
+from datetime import datetime
 
-# Configuración SSH
-raspberry_ip = "192.168.0.35"
-username = "cbpi"
-password = "Fulleravive.13"
-
-# Comando para seguir logs del servicio CraftBeerPi
-journalctl_cmd = "journalctl -u craftbeerpi.service -f --no-pager"
+# Servicio de CraftBeerPi cuyos logs se siguen
+SERVICE = "craftbeerpi.service"
 
 # Palabras clave por defecto
 DEFAULT_FILTER_KEYWORDS = ["[CHILLER]", "[FERMENTER]"]
 
-def seguir_logs(use_filter=True, custom_filters=None):
+# Espera entre reconexiones (segundos), con retroceso exponencial
+RECONNECT_MIN = 2
+RECONNECT_MAX = 60
+
+# Eventos estructurados reconocidos en los mensajes del plugin
+EVENT_PATTERNS = [
+    # "[CHILLER] [COMPRESSOR1] ENCENDIDO por histéresis", "[COMP2] APAGADO por tiempo máximo"
+    ("transition", re.compile(r"\[(?P<actor>[^\]]+)\] (?P<state>ENCENDIDO|APAGADO)(?: por (?P<reason>.+))?$")),
+    # Una línea por ciclo de control con la temperatura y el objetivo del glicol
+    ("tick", re.compile(r"\[CHILLER\] Temp actual del chiller: (?P<temp>-?[\d.]+)°C \| "
+                        r"Temp objetivo para el chiller: (?P<target>-?[\d.]+)°C")),
+    ("sensor", re.compile(r"\[CHILLER\] \[SENSOR\] (?P<text>.+)$")),
+    ("config", re.compile(r"\[CHILLER\] \[CONFIG\] (?P<text>.+)$")),
+]
+NUMERIC_FIELDS = {"temp", "target"}
+
+
+def parse_event(message):
+    """Convierte un mensaje del plugin en un evento: ``{"type": ..., campos...}``."""
+    for kind, pattern in EVENT_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            event = {"type": kind}
+            for key, value in match.groupdict().items():
+                if value is not None:
+                    event[key] = float(value) if key in NUMERIC_FIELDS else value
+            return event
+    return {"type": "log"}
+
+
+def build_pattern(keywords, regexes):
+    """Une palabras clave (literales) y expresiones regulares en una sola alternativa."""
+    parts = [re.escape(keyword) for keyword in keywords] + list(regexes)
+    return "|".join(f"(?:{part})" for part in parts) if parts else None
+
+
+def journalctl_command(pattern, cursor=None, lines=10):
+    # El filtrado se hace en la Raspberry Pi: solo viajan las líneas que coinciden
+    cmd = ["journalctl", "-u", SERVICE, "-f", "-o", "json", "--no-pager",
+           "--output-fields=MESSAGE,PRIORITY"]
+    if cursor:
+        cmd.append(f"--after-cursor={cursor}")
+    else:
+        cmd.append(f"--lines={lines}")
+    if pattern:
+        cmd += ["--case-sensitive=yes", f"--grep={pattern}"]
+    return " ".join(shlex.quote(part) for part in cmd)
+
+
+def parse_record(line, regex):
+    """Registro JSON de journald → evento, o ``None`` si no interesa."""
     try:
-        print("🔌 Conectando a Raspberry Pi...")
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(raspberry_ip, username=username, password=password)
+        record = json.loads(line)
+    except ValueError:
+        return None
+    message = record.get("MESSAGE")
+    if isinstance(message, list):
+        # journald entrega como lista de bytes los mensajes que no son UTF-8 válido
+        message = bytes(message).decode("utf-8", "replace")
+    if not isinstance(message, str):
+        return None
+    # Segunda comprobación local con la expresión ya compilada (journalctl antiguos sin --grep)
+    if regex is not None and not regex.search(message):
+        return None
 
-        print("📡 Escuchando logs de CraftBeerPi...\n")
+    event = parse_event(message)
+    event["cursor"] = record.get("__CURSOR")
+    event["time"] = datetime.fromtimestamp(int(record.get("__REALTIME_TIMESTAMP", 0)) / 1e6).isoformat(timespec="seconds")
+    event["priority"] = int(record.get("PRIORITY", 6))
+    event["message"] = message
+    return event
 
-        if not use_filter:
-            print("🔎 Modo sin filtro activado: mostrando todos los logs\n")
-        else:
-            filters_to_use = custom_filters if custom_filters else DEFAULT_FILTER_KEYWORDS
-            print(f"🔎 Filtrando por: {', '.join(filters_to_use)}\n")
 
-        stdin, stdout, stderr = ssh.exec_command(journalctl_cmd)
+def format_event(event):
+    prefix = f"{event['time']} "
+    if event["type"] == "transition":
+        reason = f" ({event['reason']})" if "reason" in event else ""
+        return f"{prefix}🔀 {event['actor']} {event['state']}{reason}"
+    if event["type"] == "tick":
+        return f"{prefix}🌡️  glicol {event['temp']:.2f}°C → objetivo {event['target']:.2f}°C"
+    icon = "❌ " if event["priority"] <= 3 else "⚠️  " if event["priority"] == 4 else ""
+    return f"{prefix}{icon}{event['message']}"
 
-        for line in iter(stdout.readline, ""):
-            if not use_filter or any(keyword in line for keyword in (custom_filters or DEFAULT_FILTER_KEYWORDS)):
-                print(line.strip())
 
-    except KeyboardInterrupt:
-        print("\n🛑 Finalizado por el usuario.")
-    except Exception as e:
-        print("❌ Error:", str(e))
+def load_cursor(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
 
-if __name__ == "__main__":
-    use_filter = True
-    custom_filters = None
 
-    if "--noFilter" in sys.argv:
-        use_filter = False
-    elif "--filter" in sys.argv:
+def save_cursor(path, cursor):
+    with open(path, "w") as f:
+        f.write(cursor)
+
+
+def seguir_logs(keywords=None, regexes=(), as_json=False, cursor_file=None, host=None):
+    # Import diferido: parse_event se usa sin conexión desde analyze_logs.py, sin paramiko
+    from deploy_plugin import create_ssh_client, load_config
+
+    config = load_config()
+    host = host or (config["hosts"] or [None])[0]
+    if not host:
+        print("❌ Error: no hay host configurado (CBPI_HOSTS o \"hosts\" en el fichero de configuración)")
+        return
+
+    pattern = build_pattern(keywords or [], regexes)
+    regex = re.compile(pattern) if pattern else None
+    cursor = load_cursor(cursor_file) if cursor_file else None
+    delay = RECONNECT_MIN
+
+    if pattern:
+        print(f"🔎 Filtrando en la Raspberry Pi por: {pattern}\n")
+    else:
+        print("🔎 Modo sin filtro activado: mostrando todos los logs\n")
+
+    while True:
+        ssh = None
         try:
-            idx = sys.argv.index("--filter")
-            keyword = sys.argv[idx + 1]
-            custom_filters = [keyword]
-        except IndexError:
-            print("❌ Error: Debes especificar una palabra clave tras '--filter'")
-            sys.exit(1)
+            print(f"🔌 Conectando a {host}...")
+            ssh = create_ssh_client(host, config)
+            transport = ssh.get_transport()
+            transport.set_keepalive(15)
+            stdin, stdout, stderr = ssh.exec_command(journalctl_command(pattern, cursor))
+            print("📡 Escuchando logs de CraftBeerPi" + (" (reanudando)" if cursor else "") + "...\n")
+            delay = RECONNECT_MIN
+
+            for line in iter(stdout.readline, ""):
+                event = parse_record(line, regex)
+                if event is None:
+                    continue
+                cursor = event["cursor"] or cursor
+                print(json.dumps(event, ensure_ascii=False) if as_json else format_event(event), flush=True)
+                if cursor_file and cursor:
+                    save_cursor(cursor_file, cursor)
+
+            error = stderr.read().decode().strip()
+            print(f"⚠️  Conexión cerrada{': ' + error if error else ''}")
+        except KeyboardInterrupt:
+            print("\n🛑 Finalizado por el usuario.")
+            return
+        except Exception as e:
+            print("❌ Error:", str(e))
+        finally:
+            if ssh is not None:
+                ssh.close()
 
-    seguir_logs(use_filter=use_filter, custom_filters=custom_filters)
+        try:
+            print(f"🔁 Reconectando en {delay} s...")
+            time.sleep(delay)
+        except KeyboardInterrupt:
+            print("\n🛑 Finalizado por el usuario.")
+            return
+        delay = min(delay * 2, RECONNECT_MAX)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sigue los logs de CraftBeerPi filtrados en la Raspberry Pi")
+    parser.add_argument("--filter", action="append", default=[], metavar="PALABRA",
+                        help="Palabra clave literal (repetible)")
+    parser.add_argument("--regex", action="append", default=[], help="Expresión regular (repetible)")
+    parser.add_argument("--noFilter", action="store_true", help="Muestra todos los logs del servicio")
+    parser.add_argument("--json", action="store_true", help="Un evento JSON por línea")
+    parser.add_argument("--cursor-file", help="Guarda el cursor de journald para reanudar entre ejecuciones")
+    parser.add_argument("--host", help="Raspberry Pi a seguir (por defecto, el primer host configurado)")
+    args = parser.parse_args()
+
+    try:
+        for expression in args.regex:
+            re.compile(expression)
+    except re.error as e:
+        print(f"❌ Error: expresión regular inválida: {e}")
+        sys.exit(1)
 
+    keywords = [] if args.noFilter else (args.filter or (DEFAULT_FILTER_KEYWORDS if not args.regex else []))
+    regexes = [] if args.noFilter else args.regex
+    seguir_logs(keywords, regexes, as_json=args.json, cursor_file=args.cursor_file, host=args.host)
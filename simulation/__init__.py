@@ -0,0 +1,10 @@
+"""Simulador de planta y reloj virtual para validar la lógica del chiller.
+
+Ejecuta la clase real del plugin contra un modelo térmico del depósito de
+glicol, los compresores y los fermentadores, en tiempo virtual::
+
+    python -m simulation --scenario crash --check
+"""
+from .plant import FermenterModel, GlycolPlant
+from .runner import Simulation, SimulationReport
+from .scenarios import SCENARIOS, check, run_scenario
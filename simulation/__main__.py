@@ -0,0 +1,37 @@
+import argparse
+import json
+import sys
+
+from .scenarios import SCENARIOS, check, run_scenario
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simula el chiller de glicol en tiempo virtual")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Escenario a ejecutar (repetible; por defecto todos)")
+    parser.add_argument("--days", type=float, help="Sobrescribe la duración del escenario en días")
+    parser.add_argument("--check", action="store_true", help="Falla si se incumple algún límite de regresión")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    violations = []
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS):
+        overrides = {"duration": args.days * 24 * 3600} if args.days else {}
+        report = run_scenario(name, **overrides)
+        results[name] = report.as_dict()
+        if not args.json:
+            print(f"== {name} ==")
+            print(report.format())
+        if args.check:
+            violations += check(name, report)
+
+    if args.json:
+        print(json.dumps(results, indent=2, default=str))
+    for violation in violations:
+        print(f"❌ {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
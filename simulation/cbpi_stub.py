@@ -0,0 +1,274 @@
+"""API mínima de CBPi para ejecutar el plugin fuera de CraftBeerPi.
+
+``install()`` registra un módulo ``cbpi.api`` sustituto solo si CraftBeerPi
+no está instalado (y ``aiohttp.web`` si tampoco está, para los endpoints). ``StubCBPi`` imita los controladores que usa la lógica
+del fermentador (fermenter, sensor, actor, config y plugin).
+"""
+import importlib
+import os
+import sys
+import types
+
+
+class _PropertyFactory:
+    def __getattr__(self, kind):
+        def factory(label, *args, **kwargs):
+            return dict(kind=kind, label=label, **kwargs)
+        return factory
+
+
+def parameters(props):
+    def decorator(cls):
+        cls.parameters = props
+        return cls
+    return decorator
+
+
+class CBPiFermenterLogic:
+
+    def __init__(self, cbpi, id, props):
+        self.cbpi = cbpi
+        self.id = id
+        self.props = props
+        self.state = False
+        self.running = False
+
+    def get_fermenter(self, id):
+        return self.cbpi.fermenter._find_by_id(id)
+
+    def get_fermenter_target_temp(self, id):
+        return self.cbpi.fermenter._find_by_id(id).target_temp
+
+    async def set_fermenter_target_temp(self, id, target_temp):
+        await self.cbpi.fermenter.set_target_temp(id, target_temp)
+
+    def get_sensor_value(self, id):
+        return self.cbpi.sensor.get_sensor_value(id)
+
+    def get_actor_state(self, id):
+        return self.cbpi.actor.find_by_id(id).state
+
+    async def actor_on(self, id, power=100):
+        await self.cbpi.actor.on(id, power)
+
+    async def actor_off(self, id):
+        await self.cbpi.actor.off(id)
+
+
+class CBPiExtension:
+
+    def __init__(self, cbpi):
+        self.cbpi = cbpi
+
+
+def request_mapping(path, method="GET", auth_required=True, **kwargs):
+    def decorator(func):
+        func.route = dict(path=path, method=method)
+        return func
+    return decorator
+
+
+def json_response(data, status=200):
+    return dict(status=status, data=data)
+
+
+class Response:
+
+    def __init__(self, text="", status=200, content_type="text/plain"):
+        self.text = text
+        self.status = status
+        self.content_type = content_type
+
+
+def install():
+    try:
+        importlib.import_module("cbpi.api")
+        return False
+    except ImportError:
+        pass
+
+    try:
+        importlib.import_module("aiohttp.web")
+    except ImportError:
+        aiohttp = types.ModuleType("aiohttp")
+        web = types.ModuleType("aiohttp.web")
+        web.json_response = json_response
+        web.Response = Response
+        aiohttp.web = web
+        sys.modules["aiohttp"] = aiohttp
+        sys.modules["aiohttp.web"] = web
+
+    cbpi_module = types.ModuleType("cbpi")
+    api = types.ModuleType("cbpi.api")
+    api.Property = _PropertyFactory()
+    api.parameters = parameters
+    api.CBPiFermenterLogic = CBPiFermenterLogic
+    api.CBPiExtension = CBPiExtension
+    api.request_mapping = request_mapping
+    api.__all__ = ["Property", "parameters", "CBPiFermenterLogic", "CBPiExtension", "request_mapping"]
+    cbpi_module.api = api
+    sys.modules["cbpi"] = cbpi_module
+    sys.modules["cbpi.api"] = api
+    return True
+
+
+class StubFermenter:
+
+    def __init__(self, id, sensor, target_temp=None):
+        self.id = id
+        self.sensor = sensor
+        self.target_temp = target_temp
+        self.steps = []
+        self.props = {}
+
+
+class StubFermenterStep:
+
+    def __init__(self, id, temp, status="I", endtime=0):
+        self.id = id
+        self.name = id
+        self.props = {"Temp": temp}
+        # "I" pendiente, "A" activo, "D" terminado
+        self.status = status
+        self.endtime = endtime
+
+
+class StubActor:
+
+    def __init__(self, id, clock):
+        self.id = id
+        self.clock = clock
+        self.state = False
+        self.commands = 0
+        # (instante monotónico, estado) en cada transición real
+        self.transitions = []
+
+    def set(self, on):
+        self.commands += 1
+        if on != self.state:
+            self.state = on
+            self.transitions.append((self.clock(), on))
+
+
+class _FermenterController:
+
+    def __init__(self):
+        self.data = {}
+        self.target_writes = 0
+
+    def _find_by_id(self, id):
+        return self.data.get(id)
+
+    async def set_target_temp(self, id, target_temp):
+        self.target_writes += 1
+        self.data[id].target_temp = target_temp
+
+
+class _SensorController:
+
+    def __init__(self):
+        self.values = {}
+        self.reads = 0
+
+    def get_sensor_value(self, id):
+        self.reads += 1
+        return dict(status=0, value=self.values.get(id))
+
+
+class _ActorController:
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.data = {}
+
+    def add(self, id):
+        self.data[id] = StubActor(id, self.clock)
+        return self.data[id]
+
+    def find_by_id(self, id):
+        return self.data[id]
+
+    async def on(self, id, power=None):
+        self.data[id].set(True)
+
+    async def off(self, id):
+        self.data[id].set(False)
+
+
+class _ConfigController:
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+    async def set(self, name, value):
+        self.values[name] = value
+
+
+class _PluginController:
+
+    def __init__(self):
+        self.registered = {}
+
+    def register(self, name, clazz):
+        self.registered[name] = clazz
+
+
+class StubMessage:
+    """Imita ``aiomqtt.Message``: el valor llega como bytes en ``payload``."""
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+class _Satellite:
+
+    def __init__(self):
+        self.handlers = {}
+
+    def subscribe(self, topic, method):
+        self.handlers.setdefault(topic, []).append(method)
+        return True
+
+    def unsubscribe(self, topic, method):
+        handlers = self.handlers.get(topic, [])
+        if method in handlers:
+            handlers.remove(method)
+
+    async def publish(self, topic, message, retain=False):
+        payload = message.encode() if isinstance(message, str) else message
+        for method in list(self.handlers.get(topic, [])):
+            await method(StubMessage(topic, payload))
+
+
+class _ConfigFolder:
+
+    def __init__(self, path):
+        self.path = path
+
+    def get_file_path(self, file):
+        return os.path.join(self.path, file)
+
+
+class StubCBPi:
+
+    def __init__(self, clock, config_path="."):
+        self.fermenter = _FermenterController()
+        self.sensor = _SensorController()
+        self.actor = _ActorController(clock)
+        self.config = _ConfigController()
+        self.plugin = _PluginController()
+        self.config_folder = _ConfigFolder(config_path)
+        self.satellite = _Satellite()
+        self.routes = {}
+
+    def register(self, obj, url_prefix=None):
+        self.routes[url_prefix] = obj
+
+    def add_fermenter(self, id, sensor, target_temp=None):
+        fermenter = StubFermenter(id, sensor, target_temp)
+        self.fermenter.data[id] = fermenter
+        return fermenter
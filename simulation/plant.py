@@ -0,0 +1,63 @@
+"""Modelo térmico concentrado del depósito de glicol, compresores y fermentadores."""
+
+
+class FermenterModel:
+    """Fermentador enfriado por un serpentín de glicol.
+
+    La bomba/válvula (ActionActuator) solo intercambia calor con el glicol
+    mientras está encendida.
+    """
+
+    def __init__(self, temp=20.0, target=18.0, heat_capacity=200e3, fermentation_power=40.0,
+                 ambient_ua=2.0, coil_ua=40.0):
+        self.temp = temp
+        self.target = target
+        self.heat_capacity = heat_capacity            # J/K
+        self.fermentation_power = fermentation_power  # W generados por la fermentación
+        self.ambient_ua = ambient_ua                  # W/K hacia el ambiente
+        self.coil_ua = coil_ua                        # W/K con el glicol (bomba encendida)
+
+
+class GlycolPlant:
+    """Depósito de glicol con N compresores y M fermentadores.
+
+    ``step()`` integra el modelo con Euler explícito y devuelve los vatios
+    extraídos del glicol por los compresores.
+    """
+
+    def __init__(self, glycol_temp=10.0, heat_capacity=185e3, ambient_temp=20.0, ambient_ua=3.0,
+                 compressor_power=(800.0, 600.0), compressor_cop_slope=0.02, fermenters=None):
+        self.glycol_temp = glycol_temp
+        self.heat_capacity = heat_capacity          # J/K
+        self.ambient_temp = ambient_temp
+        self.ambient_ua = ambient_ua                # W/K del depósito
+        self.compressor_power = list(compressor_power)  # W de frío nominales a 0 °C
+        self.compressor_cop_slope = compressor_cop_slope  # pérdida relativa por °C bajo cero
+        self.fermenters = fermenters if fermenters is not None else [FermenterModel()]
+
+    def compressor_capacity(self, index):
+        # El compresor rinde menos cuanto más frío está el glicol
+        derate = 1 + self.compressor_cop_slope * min(self.glycol_temp, 0.0)
+        # Los compresores sin potencia propia usan la del último definido
+        power = self.compressor_power[min(index, len(self.compressor_power) - 1)]
+        return power * max(derate, 0.2)
+
+    def step(self, dt, compressors_on, pumps_on):
+        glycol_heat = self.ambient_ua * (self.ambient_temp - self.glycol_temp)
+
+        cooling = 0.0
+        for index, on in enumerate(compressors_on):
+            if on:
+                cooling += self.compressor_capacity(index)
+        glycol_heat -= cooling
+
+        for fermenter, pump_on in zip(self.fermenters, pumps_on):
+            heat = fermenter.fermentation_power + fermenter.ambient_ua * (self.ambient_temp - fermenter.temp)
+            if pump_on:
+                exchanged = fermenter.coil_ua * (fermenter.temp - self.glycol_temp)
+                heat -= exchanged
+                glycol_heat += exchanged
+            fermenter.temp += heat * dt / fermenter.heat_capacity
+
+        self.glycol_temp += glycol_heat * dt / self.heat_capacity
+        return cooling
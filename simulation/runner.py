@@ -0,0 +1,242 @@
+"""Ejecuta la lógica real del plugin contra la planta simulada en tiempo virtual."""
+import asyncio
+import importlib
+import math
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from . import cbpi_stub
+from .plant import GlycolPlant
+from .vtime import VirtualTimeLoop
+
+PLUGIN_MODULE = "cbpi4_GlycolChillerWithDependantTargetTemperature"
+
+DEFAULT_PROPS = {
+    "ChillerOffsetOn": 1,
+    "ChillerOffsetOff": 1,
+    "MainCompressor": "compressor1",
+    "SecondaryCompressor": "compressor2",
+    "ActionActuator": "pump1",
+    "DependantFermenter": "fermenter1",
+    "MinTempFermenter": 0,
+    "MaxTempFermenter": 20,
+    "MinTempChillerRange": -6,
+    "MaxTempChillerRange": 10,
+    "MinTempCompressor1Range": -10,
+    "MaxTempCompressor1Range": 20,
+    "MinTempCompressor2Range": -10,
+    "MaxTempCompressor2Range": 5,
+    "Compressor2TimeOff": 25,
+    "Compressor2TimeOn": 180,
+    "ActionSignalSource": "Config",
+}
+
+SIGNAL_KEY = "fermenter_action_required"
+SIGNAL_TOPIC = "cbpi/fermenter_action_required"
+
+
+def load_plugin_class(cbpi):
+    cbpi_stub.install()
+    module = importlib.import_module(PLUGIN_MODULE)
+    module.setup(cbpi)
+    from cbpi.api import CBPiFermenterLogic
+    return next(clazz for clazz in cbpi.plugin.registered.values() if issubclass(clazz, CBPiFermenterLogic))
+
+
+class ActorReport:
+
+    def __init__(self, actor, duration):
+        self.starts = 0
+        self.on_time = 0.0
+        self.min_on = math.inf
+        self.min_off = math.inf
+        self.commands = actor.commands
+
+        last_time, last_state = 0.0, False
+        for when, state in actor.transitions:
+            period = when - last_time
+            if last_state:
+                self.on_time += period
+                self.min_on = min(self.min_on, period)
+            elif last_time > 0:
+                # El primer tramo apagado no cuenta como ciclo
+                self.min_off = min(self.min_off, period)
+            if state:
+                self.starts += 1
+            last_time, last_state = when, state
+        if last_state:
+            self.on_time += duration - last_time
+
+        hours = duration / 3600
+        self.starts_per_hour = self.starts / hours if hours else 0.0
+        self.duty_cycle = self.on_time / duration if duration else 0.0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class SimulationReport:
+
+    def __init__(self, duration, wall_time, actors, chiller_errors, fermenter_errors, cbpi):
+        self.duration = duration
+        self.wall_time = wall_time
+        self.speedup = duration / wall_time if wall_time else math.inf
+        self.actors = actors
+        self.chiller_error_mean = sum(abs(e) for e in chiller_errors) / len(chiller_errors)
+        self.chiller_error_rms = math.sqrt(sum(e * e for e in chiller_errors) / len(chiller_errors))
+        self.chiller_error_max = max(abs(e) for e in chiller_errors)
+        self.fermenter_error_mean = sum(abs(e) for e in fermenter_errors) / len(fermenter_errors)
+        self.fermenter_error_max = max(abs(e) for e in fermenter_errors)
+        self.target_writes = cbpi.fermenter.target_writes
+        self.sensor_reads = cbpi.sensor.reads
+
+    def as_dict(self):
+        data = {k: v for k, v in vars(self).items() if k != "actors"}
+        data["actors"] = {name: report.as_dict() for name, report in self.actors.items()}
+        return data
+
+    def format(self):
+        lines = [
+            f"Tiempo simulado: {self.duration / 3600:.1f} h en {self.wall_time:.1f} s (x{self.speedup:.0f})",
+            f"Error glicol: medio {self.chiller_error_mean:.2f} °C | RMS {self.chiller_error_rms:.2f} °C | máx {self.chiller_error_max:.2f} °C",
+            f"Error fermentador: medio {self.fermenter_error_mean:.2f} °C | máx {self.fermenter_error_max:.2f} °C",
+            f"Escrituras de objetivo: {self.target_writes} | lecturas de sensor: {self.sensor_reads}",
+        ]
+        for name, report in self.actors.items():
+            lines.append(
+                f"{name}: arranques {report.starts} ({report.starts_per_hour:.2f}/h) | duty {report.duty_cycle * 100:.1f} % | "
+                f"ON mín {report.min_on:.0f} s | OFF mín {report.min_off:.0f} s | comandos {report.commands}"
+            )
+        return "\n".join(lines)
+
+
+class Simulation:
+    """Conduce la clase del plugin durante ``duration`` segundos virtuales.
+
+    ``schedule`` es una lista ``(segundo, objetivo)`` con los cambios de
+    objetivo del fermentador dependiente; también se publica como pasos
+    temporizados del fermentador, como haría CBPi. ``sensor_faults`` es una
+    lista ``(inicio, fin)`` en segundos durante los que el sensor del
+    chiller no da lectura.
+    """
+
+    def __init__(self, props=None, plant=None, schedule=None, step=1.0, sensor_resolution=0.0625,
+                 start=datetime(2024, 1, 1), config_path=None, sensor_faults=None):
+        self.props = dict(DEFAULT_PROPS, **(props or {}))
+        self.plant = plant or GlycolPlant()
+        self.schedule = sorted(schedule or [])
+        self.step = step
+        self.sensor_resolution = sensor_resolution
+        self.start = start
+        # Carpeta del estado persistido; por defecto una temporal por ejecución
+        self.config_path = config_path
+        self.sensor_faults = sensor_faults or []
+
+    def run(self, duration):
+        loop = VirtualTimeLoop()
+        asyncio.set_event_loop(loop)
+        try:
+            wall_start = time.perf_counter()
+            if self.config_path is None:
+                with tempfile.TemporaryDirectory() as config_path:
+                    report = loop.run_until_complete(self._run(duration, config_path))
+            else:
+                report = loop.run_until_complete(self._run(duration, self.config_path))
+            report.wall_time = time.perf_counter() - wall_start
+            report.speedup = duration / report.wall_time if report.wall_time else math.inf
+            return report
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def _advance_steps(self, steps, active):
+        for index, step in enumerate(steps):
+            step.status = "D" if index < active else "A" if index == active else "I"
+        if active + 1 < len(self.schedule):
+            end = self.start + timedelta(seconds=self.schedule[active + 1][0])
+            steps[active].endtime = end.timestamp()
+
+    def _quantize(self, value):
+        if not self.sensor_resolution:
+            return value
+        return round(value / self.sensor_resolution) * self.sensor_resolution
+
+    async def _run(self, duration, config_path):
+        loop = asyncio.get_event_loop()
+        origin = loop.time()
+        elapsed = lambda: loop.time() - origin
+
+        cbpi = cbpi_stub.StubCBPi(elapsed, config_path)
+        logic_class = load_plugin_class(cbpi)
+        from cbpi4_GlycolChillerWithDependantTargetTemperature.clock import LoopClock
+        from cbpi4_GlycolChillerWithDependantTargetTemperature.staging import parse_compressor_list
+
+        compressors = [self.props["MainCompressor"], self.props["SecondaryCompressor"]]
+        compressors += [options["actor"] for options in parse_compressor_list(self.props.get("ExtraCompressors"))]
+        pumps = [self.props["ActionActuator"]]
+        pumps += [options["actor"] for options in parse_compressor_list(self.props.get("ExtraActuators"))]
+        for actor in compressors + pumps:
+            cbpi.actor.add(actor)
+
+        dependant = self.plant.fermenters[0]
+        chiller = cbpi.add_fermenter("chiller", "chiller_sensor")
+        chiller.props = self.props
+        fermenter = cbpi.add_fermenter(self.props["DependantFermenter"], "fermenter_sensor", dependant.target)
+        fermenter.steps = [
+            cbpi_stub.StubFermenterStep(f"step{index}", target)
+            for index, (_, target) in enumerate(self.schedule)
+        ]
+
+        logic = logic_class(cbpi, chiller.id, self.props)
+        logic.clock = LoopClock(self.start, loop)
+        # Las métricas guardan el reloj al construirse
+        logic.metrics.clock = logic.clock
+        logic.running = True
+        task = asyncio.ensure_future(logic.run())
+
+        schedule = list(self.schedule)
+        chiller_errors, fermenter_errors = [], []
+        action_required = False
+        mqtt = str(self.props.get("ActionSignalSource")).lower() == "mqtt"
+        topic = self.props.get("ActionSignalTarget") or SIGNAL_TOPIC
+
+        while elapsed() < duration:
+            while schedule and schedule[0][0] <= elapsed():
+                dependant.target = fermenter.target_temp = schedule.pop(0)[1]
+                self._advance_steps(fermenter.steps, len(self.schedule) - len(schedule) - 1)
+
+            now = elapsed()
+            faulted = any(start <= now < end for start, end in self.sensor_faults)
+            cbpi.sensor.values["chiller_sensor"] = None if faulted else self._quantize(self.plant.glycol_temp)
+            cbpi.sensor.values["fermenter_sensor"] = self._quantize(dependant.temp)
+
+            # Control sencillo del fermentador: pide frío con histéresis
+            if dependant.temp > dependant.target + 0.3:
+                action_required = True
+            elif dependant.temp < dependant.target:
+                action_required = False
+            if mqtt:
+                await cbpi.satellite.publish(topic, "1" if action_required else "0")
+            else:
+                cbpi.config.values[SIGNAL_KEY] = "1" if action_required else "0"
+
+            await asyncio.sleep(self.step)
+
+            self.plant.step(
+                self.step,
+                [cbpi.actor.find_by_id(actor).state for actor in compressors],
+                [cbpi.actor.find_by_id(pump).state for pump in pumps],
+            )
+            if chiller.target_temp is not None and not faulted:
+                chiller_errors.append(self.plant.glycol_temp - chiller.target_temp)
+            fermenter_errors.append(dependant.temp - dependant.target)
+
+        logic.running = False
+        await task
+        if logic.coordinator is not None and logic.coordinator.task is not None:
+            # El coordinador termina en su siguiente tick, al no quedar instancias
+            await logic.coordinator.task
+
+        actors = {actor: ActorReport(cbpi.actor.find_by_id(actor), duration) for actor in compressors + pumps}
+        return SimulationReport(duration, 0.0, actors, chiller_errors, fermenter_errors, cbpi)
@@ -0,0 +1,118 @@
+"""Escenarios de referencia y límites de regresión."""
+from .plant import FermenterModel, GlycolPlant
+from .runner import Simulation
+
+DAY = 24 * 3600
+
+SCENARIOS = {
+    # Fermentación estable a 18 °C durante tres días
+    "steady": dict(
+        duration=3 * DAY,
+        schedule=[(0, 18.0)],
+        plant=lambda: GlycolPlant(fermenters=[FermenterModel(temp=18.0, target=18.0)]),
+    ),
+    # Dos días a 18 °C y cold crash a 2 °C
+    "crash": dict(
+        duration=4 * DAY,
+        schedule=[(0, 18.0), (2 * DAY, 2.0)],
+        plant=lambda: GlycolPlant(fermenters=[FermenterModel(temp=18.0, target=18.0)]),
+    ),
+    # El mismo cold crash con preenfriamiento del glicol antes del cambio de paso
+    "precool": dict(
+        duration=4 * DAY,
+        schedule=[(0, 18.0), (2 * DAY, 2.0)],
+        plant=lambda: GlycolPlant(fermenters=[FermenterModel(temp=18.0, target=18.0)]),
+        props={"PrecoolMode": "Yes", "PrecoolMargin": 15},
+    ),
+    # El mismo cold crash con el objetivo del glicol corregido por PID
+    "pid": dict(
+        duration=4 * DAY,
+        schedule=[(0, 18.0), (2 * DAY, 2.0)],
+        plant=lambda: GlycolPlant(fermenters=[FermenterModel(temp=18.0, target=18.0)]),
+        props={"TargetMode": "PID"},
+    ),
+    # Sensor del chiller desconectado 6 horas; ciclos fijos del compresor principal
+    "sensor_fault": dict(
+        duration=2 * DAY,
+        schedule=[(0, 18.0)],
+        plant=lambda: GlycolPlant(fermenters=[FermenterModel(temp=18.0, target=18.0)]),
+        props={"FailSafeMode": "Duty", "FailSafeDuty": 20, "FailSafeCycle": 30},
+        sensor_faults=[(DAY, DAY + 6 * 3600)],
+    ),
+    # Tres compresores escalonados por ritmo de bajada durante un cold crash
+    "staging": dict(
+        duration=3 * DAY,
+        schedule=[(0, 18.0), (DAY, 2.0)],
+        plant=lambda: GlycolPlant(compressor_power=(500.0, 500.0, 500.0),
+                                  fermenters=[FermenterModel(temp=18.0, target=18.0)]),
+        props={
+            "MaxTempCompressor2Range": 20,
+            "ExtraCompressors": "compressor3 off=10",
+            "StagePulldownRate": 0.02,
+            "StageDelay": 10,
+        },
+    ),
+}
+
+# Límites que no deben empeorar; ajustarlos solo con una justificación
+LIMITS = {
+    "steady": {
+        "compressor1.starts_per_hour": 6.0,
+        "compressor2.starts": 0,
+        "fermenter_error_mean": 0.5,
+    },
+    "crash": {
+        "compressor1.starts_per_hour": 6.0,
+        "compressor2.min_off": 25 * 60,
+        "fermenter_error_max": 16.5,
+    },
+    "precool": {
+        "compressor1.starts_per_hour": 6.0,
+        "compressor2.min_off": 25 * 60,
+        "fermenter_error_max": 16.5,
+        # Sin preenfriamiento el glicol llega al cambio de paso unos 13 °C por encima
+        "chiller_error_max": 3.0,
+    },
+    "pid": {
+        "compressor1.starts_per_hour": 6.0,
+        "compressor2.min_off": 25 * 60,
+        "fermenter_error_max": 16.5,
+        "fermenter_error_mean": 0.4,
+    },
+    "sensor_fault": {
+        "compressor1.starts_per_hour": 6.0,
+        "compressor1.min_off": 3 * 60,
+        "fermenter_error_max": 2.0,
+    },
+    "staging": {
+        "compressor1.starts_per_hour": 6.0,
+        "compressor3.min_off": 10 * 60,
+    },
+}
+
+_MINIMUMS = {"min_off", "min_on"}
+
+
+def run_scenario(name, props=None, **overrides):
+    scenario = dict(SCENARIOS[name], **overrides)
+    props = dict(scenario.get("props", {}), **(props or {}))
+    simulation = Simulation(props=props, plant=scenario["plant"](), schedule=scenario["schedule"],
+                            sensor_faults=scenario.get("sensor_faults"))
+    return simulation.run(scenario["duration"])
+
+
+def check(name, report):
+    """Devuelve la lista de límites de regresión incumplidos."""
+    violations = []
+    data = report.as_dict()
+    for key, limit in LIMITS.get(name, {}).items():
+        value = data
+        for part in key.split("."):
+            value = value["actors"][part] if part in data["actors"] else value[part]
+        if key.rsplit(".", 1)[-1] in _MINIMUMS:
+            failed = value < limit
+        else:
+            failed = value > limit
+        if failed:
+            violations.append(f"{name}: {key} = {value:.2f} (límite {limit})")
+    return violations
@@ -0,0 +1,46 @@
+"""Bucle asyncio de tiempo virtual.
+
+Cuando el bucle no tiene trabajo listo, en lugar de esperar en el selector
+avanza el reloj hasta el siguiente temporizador. ``asyncio.sleep``,
+``wait_for`` y ``call_at`` funcionan igual, pero sin esperas reales. No
+admite E/S real. ``run_in_executor`` con el ejecutor por defecto ejecuta
+la función en el acto, dentro del bucle: un hilo real terminaría en un
+instante virtual arbitrario.
+"""
+import asyncio
+
+
+class _VirtualSelector:
+
+    def __init__(self, loop, selector):
+        self._loop = loop
+        self._selector = selector
+
+    def select(self, timeout=None):
+        if timeout:
+            self._loop._virtual_time += timeout
+        return []
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+
+    def __init__(self):
+        super().__init__()
+        self._virtual_time = 0.0
+        self._selector = _VirtualSelector(self, self._selector)
+
+    def time(self):
+        return self._virtual_time
+
+    def run_in_executor(self, executor, func, *args):
+        if executor is not None:
+            return super().run_in_executor(executor, func, *args)
+        future = self.create_future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Los escenarios se importan desde la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: escenarios de varios días simulados (minutos de ejecución)")
@@ -0,0 +1,158 @@
+"""Caché de comandos a actores: supresión, reafirmación y reintentos."""
+import asyncio
+from datetime import datetime, timedelta
+
+from simulation import cbpi_stub
+
+cbpi_stub.install()
+
+from cbpi4_GlycolChillerWithDependantTargetTemperature.actors import ActorCommandCache  # noqa: E402
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.time = 0.0
+
+    def now(self):
+        return datetime(2024, 1, 1) + timedelta(seconds=self.time)
+
+    def monotonic(self):
+        return self.time
+
+
+class FakeMetrics:
+
+    def observe_actor(self, actor, latency):
+        pass
+
+
+class FakeLogic:
+    """Actores en memoria; ``failures`` hace fallar los primeros comandos."""
+
+    def __init__(self, failures=0):
+        self.clock = FakeClock()
+        self.metrics = FakeMetrics()
+        self.states = {}
+        self.commands = []
+        self.failures = failures
+
+    async def actor_on(self, actor):
+        await self._command(actor, True)
+
+    async def actor_off(self, actor):
+        await self._command(actor, False)
+
+    async def _command(self, actor, on):
+        self.commands.append((actor, on))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("actor no disponible")
+        self.states[actor] = on
+
+    def get_actor_state(self, actor):
+        return self.states.get(actor)
+
+
+def test_repeated_and_cancelled_commands_are_suppressed():
+    logic = FakeLogic()
+    cache = ActorCommandCache(logic)
+
+    async def scenario():
+        cache.set("c1", True)
+        await cache.flush()
+        cache.set("c1", True)
+        # Órdenes contrarias en el mismo ciclo se anulan
+        cache.set("c2", True)
+        cache.set("c2", False)
+        cache.set("c2", True)
+        await cache.flush()
+
+    asyncio.run(scenario())
+    assert logic.commands == [("c1", True), ("c2", True)]
+    assert cache.suppressed >= 1
+    assert cache.issued == 2
+
+
+def test_reconcile_reasserts_on_mismatch_and_interval():
+    logic = FakeLogic()
+    cache = ActorCommandCache(logic, reassert_interval=300)
+
+    async def scenario():
+        cache.set("c1", True)
+        await cache.flush()
+        cache.reconcile()
+        assert cache.pending == {}
+
+        # Alguien apaga el actor fuera del plugin
+        logic.states["c1"] = False
+        cache.reconcile()
+        assert cache.pending == {"c1": True}
+        await cache.flush()
+
+        logic.clock.time += 301
+        cache.reconcile()
+        assert cache.pending == {"c1": True}
+        await cache.flush()
+
+    asyncio.run(scenario())
+    assert logic.commands == [("c1", True)] * 3
+
+
+def test_failed_commands_retry_with_backoff(monkeypatch):
+    logic = FakeLogic(failures=2)
+    cache = ActorCommandCache(logic, retries=2, backoff=0.01)
+    sleeps = []
+    sleep = asyncio.sleep
+
+    async def recording_sleep(delay, *args):
+        sleeps.append(delay)
+        await sleep(0)
+
+    async def scenario():
+        monkeypatch.setattr(asyncio, "sleep", recording_sleep)
+        cache.set("c1", True)
+        await cache.drain()
+
+    asyncio.run(scenario())
+    assert logic.commands == [("c1", True)] * 3
+    assert sleeps == [0.01, 0.02]
+    assert cache.applied == {"c1": True}
+    assert cache.stats["c1"].failures == 2
+
+
+def test_gives_up_after_the_last_retry():
+    logic = FakeLogic(failures=10)
+    cache = ActorCommandCache(logic, retries=1, backoff=0)
+
+    async def scenario():
+        cache.set("c1", False)
+        await cache.drain()
+
+    asyncio.run(scenario())
+    assert len(logic.commands) == 2
+    assert "c1" not in cache.applied
+    assert cache.in_flight == {}
+
+
+def test_reconcile_reads_actor_state_once_per_tick():
+    from cbpi4_GlycolChillerWithDependantTargetTemperature.coordinator import TickSnapshot
+
+    logic = FakeLogic()
+    reads = []
+    get_actor_state = logic.get_actor_state
+    logic.get_actor_state = lambda actor: reads.append(actor) or get_actor_state(actor)
+    caches = [ActorCommandCache(logic) for _ in range(3)]
+
+    async def scenario():
+        for cache in caches:
+            cache.set("c1", True)
+            await cache.flush()
+        logic.states["c1"] = False
+        snapshot = TickSnapshot(None, logic)
+        for cache in caches:
+            cache.reconcile(reader=snapshot)
+            assert cache.pending == {"c1": True}
+
+    asyncio.run(scenario())
+    assert reads == ["c1"]
@@ -0,0 +1,95 @@
+"""Agregación de estadísticas de ``analyze_logs.py``."""
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from analyze_logs import TEXT_TIMESTAMP, Analysis, analyze, analyze_file, telemetry, text_timestamp
+
+
+def record(timestamp, message):
+    return json.dumps({"MESSAGE": message, "__REALTIME_TIMESTAMP": str(int(timestamp * 1e6))})
+
+
+def transition(actor, on, reason="histéresis"):
+    return f"[CHILLER] [{actor}] {'ENCENDIDO' if on else 'APAGADO'} por {reason}"
+
+
+def tick(temp, target):
+    return f"[CHILLER] Temp actual del chiller: {temp:.2f}°C | Temp objetivo para el chiller: {target:.2f}°C"
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    lines = [
+        record(0, transition("COMPRESSOR1", True)),
+        record(0, tick(3.0, 2.0)),
+        record(60, tick(2.2, 2.0)),
+        record(600, transition("COMPRESSOR1", False)),
+        record(660, transition("COMPRESSOR1", True)),
+        record(720, transition("ACTUATOR", True)),
+        record(725, transition("ACTUATOR", False)),
+        record(3600, tick(2.0, 2.0)),
+        "línea que no es un evento",
+    ]
+    path = tmp_path / "chiller.json.gz"
+    with gzip.open(path, "wt") as f:
+        f.write("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_actor_statistics(log_file):
+    data = analyze_file(log_file, band=0.5, min_on=0, min_off=180).as_dict()
+    compressor = data["actors"]["COMPRESSOR1"]
+    assert compressor["starts"] == 2
+    assert compressor["min_on"] == 600
+    assert compressor["min_off"] == 60
+    assert compressor["short_off"] == 1
+    # El tramo encendido final cuenta hasta el último evento
+    assert compressor["duty"] == pytest.approx((600 + 2940) / 3600)
+    assert compressor["reasons"] == {"ENCENDIDO por histéresis": 2, "APAGADO por histéresis": 1}
+    # El actuador PWM no cuenta para los ciclos cortos
+    assert data["actors"]["ACTUATOR"]["short_on"] == 0
+    assert data["lines"] == 9
+    # Solo el primer hueco (60 s) cuenta: el segundo supera MAX_TICK_GAP
+    assert data["time_in_band"] == 0.0
+
+
+def test_merge_matches_single_pass(log_file):
+    single = analyze_file(log_file).as_dict()
+    merged = analyze([log_file, log_file], jobs=1).as_dict()
+    assert merged["actors"]["COMPRESSOR1"]["starts"] == 2 * single["actors"]["COMPRESSOR1"]["starts"]
+    assert merged["lines"] == 2 * single["lines"]
+
+
+def test_empty_analysis():
+    data = Analysis().close().as_dict()
+    assert data["first"] is None and data["actors"] == {} and data["time_in_band"] is None
+
+
+def test_telemetry_without_readings_has_no_ticks(tmp_path):
+    path = str(tmp_path / "telemetry.bin")
+    ring = telemetry.TelemetryRing(path, 10)
+    ring.append(0, 2.0, 2.0, 10.0, 1)
+    ring.append(60, telemetry.NO_READING, 2.0, 10.0, 0)
+    ring.close()
+    data = analyze_file(path).as_dict()
+    assert data["lines"] == 2
+    assert data["actors"]["STAGE1"]["starts"] == 1
+    assert data["time_in_band"] is None
+
+
+@pytest.mark.parametrize("line, expected", [
+    (b"2025-10-09T08:53:20+0200 pi cbpi[1]: [CHILLER] x", 1759992800),
+    (b"2025-10-09T06:53:20+00:00 pi cbpi[1]: [CHILLER] x", 1759992800),
+    (b"2025-10-09T01:53:20-0500 pi cbpi[1]: [CHILLER] x", 1759992800),
+    (b"2025-10-09T06:53:20Z pi cbpi[1]: [CHILLER] x", 1759992800),
+])
+def test_short_iso_offsets_are_converted_to_utc(line, expected):
+    assert text_timestamp(TEXT_TIMESTAMP.match(line)) == expected
+
+
+def test_timestamps_without_offset_are_local_time():
+    line = b"2025-10-09 08:53:20,123 - [CHILLER] x"
+    assert text_timestamp(TEXT_TIMESTAMP.match(line)) == datetime(2025, 10, 9, 8, 53, 20).timestamp()
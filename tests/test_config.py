@@ -0,0 +1,57 @@
+"""Validación de ``ChillerConfig.from_props``."""
+import pytest
+
+from simulation import cbpi_stub
+from simulation.runner import DEFAULT_PROPS
+
+cbpi_stub.install()
+
+from cbpi4_GlycolChillerWithDependantTargetTemperature.config import ChillerConfig  # noqa: E402
+
+
+def test_defaults_are_valid():
+    config = ChillerConfig.from_props(DEFAULT_PROPS)
+    assert config.fermenters == (("fermenter1", 1.0),)
+    assert config.chiller_target(DEFAULT_PROPS["MinTempFermenter"]) == DEFAULT_PROPS["MinTempChillerRange"]
+    assert config.chiller_target(DEFAULT_PROPS["MaxTempFermenter"]) == DEFAULT_PROPS["MaxTempChillerRange"]
+
+
+def test_collects_every_error():
+    props = dict(DEFAULT_PROPS, ChillerOffsetOn="abc", MaxTempFermenter=-5, ActorTimeout=0,
+                 ActionSignalSource="Serial")
+    with pytest.raises(ValueError) as error:
+        ChillerConfig.from_props(props)
+    message = str(error.value)
+    for fragment in ("ChillerOffsetOn", "MaxTempFermenter", "ActorTimeout", "ActionSignalSource"):
+        assert fragment in message
+
+
+def test_extra_fermenters_merge_with_the_main_one():
+    props = dict(DEFAULT_PROPS, DependantFermenters="fermenter1:2, fermenter2, fermenter2:3")
+    config = ChillerConfig.from_props(props)
+    assert config.fermenters == (("fermenter1", 2.0), ("fermenter2", 1.0))
+
+
+def test_extra_actuators_validate_their_cycle():
+    config = ChillerConfig.from_props(dict(DEFAULT_PROPS, ExtraActuators="pump2 cycle=60; pump3"))
+    assert [dict(options)["actor"] for options in config.extra_actuators] == ["pump2", "pump3"]
+    with pytest.raises(ValueError, match="pump2"):
+        ChillerConfig.from_props(dict(DEFAULT_PROPS, ExtraActuators="pump2 cycle=8 min=5"))
+
+
+def test_config_is_immutable_and_comparable():
+    config = ChillerConfig.from_props(DEFAULT_PROPS)
+    with pytest.raises(AttributeError):
+        config.offset_on = 3
+    assert config == ChillerConfig.from_props(dict(DEFAULT_PROPS))
+    assert config != ChillerConfig.from_props(dict(DEFAULT_PROPS, ChillerOffsetOn=2))
+
+
+@pytest.mark.parametrize("days, valid", [(0, True), (7, True), (0.000001, False), (-1, False)])
+def test_telemetry_days_needs_room_for_a_record(days, valid):
+    props = dict(DEFAULT_PROPS, TelemetryDays=days)
+    if valid:
+        assert ChillerConfig.from_props(props).telemetry_days == days
+    else:
+        with pytest.raises(ValueError, match="TelemetryDays"):
+            ChillerConfig.from_props(props)
@@ -0,0 +1,77 @@
+"""Capa de entrada: lecturas, agregación y caché de temperaturas filtradas."""
+from types import SimpleNamespace
+
+from simulation import cbpi_stub
+
+cbpi_stub.install()
+
+from cbpi4_GlycolChillerWithDependantTargetTemperature.inputs import InputWatcher  # noqa: E402
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.time = 0.0
+
+    def monotonic(self):
+        return self.time
+
+
+class FakeReader:
+
+    def __init__(self):
+        self.sensors = {"chiller": 0.0, "s1": 20.0, "s2": 13.0}
+        self.fermenters = {
+            "f1": SimpleNamespace(sensor="s1", target_temp=18.0),
+            "f2": SimpleNamespace(sensor="s2", target_temp=12.0),
+        }
+        self.reads = 0
+
+    def get_sensor_value(self, id):
+        self.reads += 1
+        return {"value": self.sensors[id]}
+
+    def get_fermenter(self, id):
+        return self.fermenters.get(id)
+
+
+def watcher(policy="Min", track_temps=False):
+    reader = FakeReader()
+    logic = SimpleNamespace(clock=FakeClock(), chiller=SimpleNamespace(sensor="chiller"))
+    inputs = InputWatcher(logic, [("f1", 1.0), ("f2", 1.0)], policy, sensor_filter={"alpha": 1, "window": 1})
+    inputs.track_temps = track_temps
+    return inputs, reader
+
+
+def test_fermenter_error_reuses_the_readings_of_the_poll():
+    inputs, reader = watcher(track_temps=True)
+    inputs.poll(reader)
+    reads = reader.reads
+    assert inputs.fermenter_error() == 2.0
+    assert inputs.fermenter_error() == 2.0
+    # Ni lecturas nuevas ni muestras repetidas en los filtros
+    assert reader.reads == reads
+    assert inputs.filters["s1"].size == 1
+
+
+def test_fermenter_temps_are_only_read_when_needed():
+    inputs, reader = watcher()
+    changed, chiller_temp, target = inputs.poll(reader)
+    assert (changed, chiller_temp, target) == (True, 0.0, 12.0)
+    assert reader.reads == 1
+    assert inputs.fermenter_error() is None
+
+
+def test_demand_policy_follows_the_warmest_fermenter():
+    inputs, reader = watcher("Demand")
+    assert inputs.poll(reader)[2] == 18.0
+    reader.sensors["s2"] = 20.0
+    assert inputs.poll(reader)[2] == 12.0
+
+
+def test_fermenter_without_target_drops_out():
+    inputs, reader = watcher(track_temps=True)
+    inputs.poll(reader)
+    reader.fermenters["f1"].target_temp = None
+    assert inputs.poll(reader)[2] == 12.0
+    assert inputs.fermenter_error() == 1.0
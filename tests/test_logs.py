@@ -0,0 +1,39 @@
+"""Eventos estructurados de los logs del plugin (``logs.py``)."""
+import json
+import re
+
+from logs import build_pattern, parse_event, parse_record
+
+
+def test_transition_events():
+    assert parse_event("[CHILLER] [COMPRESSOR1] ENCENDIDO por histéresis") == {
+        "type": "transition", "actor": "COMPRESSOR1", "state": "ENCENDIDO", "reason": "histéresis"}
+    assert parse_event("[CHILLER] [ACTUATOR:pump2] APAGADO") == {
+        "type": "transition", "actor": "ACTUATOR:pump2", "state": "APAGADO"}
+
+
+def test_tick_event_has_numeric_fields():
+    event = parse_event("[CHILLER] Temp actual del chiller: -1.25°C | Temp objetivo para el chiller: 0.50°C")
+    assert event == {"type": "tick", "temp": -1.25, "target": 0.5}
+
+
+def test_other_messages():
+    assert parse_event("[CHILLER] [SENSOR] glicol vuelve a dar lecturas") == {
+        "type": "sensor", "text": "glicol vuelve a dar lecturas"}
+    assert parse_event("algo sin formato") == {"type": "log"}
+
+
+def test_pattern_escapes_keywords():
+    pattern = build_pattern(["[CHILLER]"], [r"COMP\d"])
+    assert pattern == r"(?:\[CHILLER\])|(?:COMP\d)"
+    assert build_pattern([], []) is None
+
+
+def test_parse_record_filters_and_decodes():
+    regex = re.compile(build_pattern(["[CHILLER]"], []))
+    record = {"MESSAGE": list("[CHILLER] [COMP2] APAGADO por rango".encode()),
+              "__CURSOR": "s=1", "__REALTIME_TIMESTAMP": "1700000000000000", "PRIORITY": "4"}
+    event = parse_record(json.dumps(record), regex)
+    assert event["actor"] == "COMP2" and event["cursor"] == "s=1" and event["priority"] == 4
+    assert parse_record(json.dumps({"MESSAGE": "otro servicio"}), regex) is None
+    assert parse_record("no es json", regex) is None
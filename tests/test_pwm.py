@@ -0,0 +1,86 @@
+"""Canal PWM y reparto de fases."""
+import asyncio
+import time
+
+import pytest
+
+from simulation import cbpi_stub
+
+cbpi_stub.install()
+
+from cbpi4_GlycolChillerWithDependantTargetTemperature.pwm import PwmChannel, phase_durations  # noqa: E402
+
+
+@pytest.mark.parametrize("duty, expected", [
+    (0.5, (60, 60)),
+    (0.0, (5, 115)),
+    (1.0, (115, 5)),
+    (0.01, (5, 115)),
+])
+def test_phase_durations_respect_minimum(duty, expected):
+    assert phase_durations(duty, 120, 5) == pytest.approx(expected)
+
+
+def test_stalled_loop_does_not_replay_missed_phases():
+    switches = []
+
+    async def switch(actor, on):
+        switches.append((asyncio.get_event_loop().time(), on))
+
+    async def scenario():
+        loop = asyncio.get_event_loop()
+        channel = PwmChannel("pump", switch, cycle_seconds=0.2, min_seconds=0.01)
+        channel.set_duty(0.5)
+        await asyncio.sleep(0.05)
+        # Bloquea el bucle durante varios ciclos completos
+        time.sleep(0.5)
+        resumed = loop.time()
+        await asyncio.sleep(0.05)
+        channel.set_duty(None)
+        await asyncio.sleep(0.01)
+        return channel, resumed
+
+    channel, resumed = asyncio.run(scenario())
+    after = [when for when, _ in switches if when >= resumed]
+    # Una sola conmutación al reanudar: la siguiente fase dura de nuevo 0.1 s
+    assert len(after) <= 2
+    assert channel.deadline > resumed + 0.05
+
+
+def run_channel(duty_changes, until):
+    """Conmutaciones ``(instante, estado)`` en tiempo virtual para ``[(instante, duty)]``."""
+    from simulation.vtime import VirtualTimeLoop
+
+    switches = []
+    loop = VirtualTimeLoop()
+
+    async def switch(actor, on):
+        switches.append((round(loop.time() - origin, 3), on))
+
+    async def scenario():
+        channel = PwmChannel("pump", switch, cycle_seconds=100, min_seconds=10)
+        for when, duty in duty_changes:
+            await asyncio.sleep(when - (loop.time() - origin))
+            channel.set_duty(duty)
+        await asyncio.sleep(until - (loop.time() - origin))
+        channel.stop()
+
+    origin = loop.time()
+    try:
+        loop.run_until_complete(scenario())
+    finally:
+        loop.close()
+    return switches
+
+
+def test_channel_switches_on_exact_deadlines():
+    assert run_channel([(0, 0.3)], 250) == [(0, True), (30, False), (100, True), (130, False), (200, True), (230, False)]
+
+
+def test_stopping_respects_the_minimum_on_time():
+    # Parar 2 s después de encender: el apagado espera a min_seconds
+    assert run_channel([(0, 0.5), (2, None)], 100) == [(0, True), (10, False)]
+
+
+def test_resuming_continues_the_current_on_phase():
+    assert run_channel([(0, 0.5), (5, None), (8, 0.5)], 60) == [(0, True), (50, False)]
@@ -0,0 +1,15 @@
+"""Regresión de los escenarios de simulación frente a sus límites (``simulation/scenarios.py``)."""
+import pytest
+
+from simulation.scenarios import LIMITS, SCENARIOS, check, run_scenario
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+def test_scenario_within_limits(name):
+    report = run_scenario(name)
+    assert check(name, report) == []
+
+
+def test_every_scenario_has_limits():
+    assert set(LIMITS) == set(SCENARIOS)
@@ -0,0 +1,66 @@
+"""Filtro de entrada de sensores y detección de fallos."""
+import pytest
+
+from simulation import cbpi_stub
+
+cbpi_stub.install()
+
+from cbpi4_GlycolChillerWithDependantTargetTemperature.sensors import SensorFilter  # noqa: E402
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.time = 0.0
+
+    def monotonic(self):
+        return self.time
+
+
+def feed(sensor, clock, values, step=1.0):
+    for value in values:
+        sensor.update(value)
+        clock.time += step
+    return sensor.value
+
+
+def test_median_rejects_a_single_spike():
+    clock = FakeClock()
+    sensor = SensorFilter("glicol", clock, window=5, alpha=1)
+    assert feed(sensor, clock, [2.0, 2.0, 40.0, 2.0, 2.0]) == 2.0
+
+
+def test_ema_and_rate_limit():
+    clock = FakeClock()
+    sensor = SensorFilter("glicol", clock, window=1, alpha=0.5)
+    assert feed(sensor, clock, [0.0, 4.0]) == pytest.approx(2.0)
+
+    clock = FakeClock()
+    sensor = SensorFilter("glicol", clock, window=1, alpha=1, max_rate=6)
+    # 6 °C/min con lecturas cada 10 s: como mucho 1 °C por lectura
+    assert feed(sensor, clock, [0.0, 10.0], step=10) == pytest.approx(1.0)
+
+
+def test_stale_sensor_faults_and_recovers():
+    clock = FakeClock()
+    sensor = SensorFilter("glicol", clock, stale_after=120, frozen_after=0)
+    feed(sensor, clock, [2.0])
+    feed(sensor, clock, [None] * 119)
+    assert not sensor.faulted
+    feed(sensor, clock, [None])
+    assert sensor.faulted
+    # Mientras tanto se mantiene el último valor filtrado
+    assert sensor.value == 2.0
+    feed(sensor, clock, [2.5])
+    assert not sensor.faulted
+
+
+def test_frozen_sensor_faults():
+    clock = FakeClock()
+    sensor = SensorFilter("glicol", clock, stale_after=120, frozen_after=600)
+    feed(sensor, clock, [3.0] * 600, step=1)
+    assert not sensor.faulted
+    feed(sensor, clock, [3.0])
+    assert sensor.faulted
+    feed(sensor, clock, [3.1])
+    assert not sensor.faulted
@@ -0,0 +1,42 @@
+"""Fuentes de la señal "action required" frente al stub de CBPi."""
+import asyncio
+
+from simulation import cbpi_stub
+
+cbpi_stub.install()
+
+from cbpi4_GlycolChillerWithDependantTargetTemperature.signals import create_signal_source  # noqa: E402
+
+
+def test_mqtt_signal_through_satellite():
+    cbpi = cbpi_stub.StubCBPi(lambda: 0.0)
+    topic = "cbpi/fermenter_action_required"
+    source = create_signal_source(cbpi, "MQTT")
+
+    async def scenario():
+        await source.start()
+        assert source.subscribed
+        assert await source.get() is False
+        await cbpi.satellite.publish(topic, "1")
+        assert await source.get() is True
+        await cbpi.satellite.publish(topic, b"0")
+        assert await source.get() is False
+        await source.stop()
+        assert not source.subscribed
+        assert cbpi.satellite.handlers[topic] == []
+
+    asyncio.run(scenario())
+
+
+def test_mqtt_without_satellite_does_not_subscribe():
+    cbpi = cbpi_stub.StubCBPi(lambda: 0.0)
+    cbpi.satellite = None
+    source = create_signal_source(cbpi, "MQTT")
+
+    async def scenario():
+        await source.start()
+        await source.stop()
+        assert await source.get() is False
+
+    asyncio.run(scenario())
+    assert not source.subscribed
@@ -0,0 +1,68 @@
+"""Escalonamiento de compresores y rotación lead/lag."""
+from datetime import datetime, timedelta
+
+from simulation import cbpi_stub
+
+cbpi_stub.install()
+
+from cbpi4_GlycolChillerWithDependantTargetTemperature.staging import (  # noqa: E402
+    CompressorStage, StagingEngine, parse_compressor_list)
+
+START = datetime(2024, 1, 1)
+
+
+def engine(**options):
+    stages = [CompressorStage(f"c{index}", f"COMP{index}", min_off=3) for index in (1, 2, 3)]
+    return StagingEngine(stages, offset_on=1, offset_off=1, **options)
+
+
+def switched(changes):
+    return [(stage.actor, on, reason) for stage, on, reason in changes]
+
+
+def test_parse_compressor_list():
+    assert parse_compressor_list("c3 min=-10 max=5; c4 off=25 run=180;") == [
+        {"actor": "c3", "min": -10.0, "max": 5.0},
+        {"actor": "c4", "off": 25.0, "run": 180.0},
+    ]
+
+
+def test_lead_rotates_to_the_least_used_compressor():
+    staging = engine(pulldown_rate=0.1, stage_delay=5)
+    now = START
+    leads = []
+    for cycle in range(6):
+        changes = staging.decide(5.0, 2.0, now)
+        leads.append(changes[0][0].actor)
+        now += timedelta(minutes=10 + cycle)
+        staging.decide(0.5, 2.0, now)
+        now += timedelta(minutes=10)
+    # Cada compresor lidera por turnos según su tiempo de marcha acumulado
+    assert leads == ["c1", "c2", "c3", "c1", "c2", "c3"]
+
+
+def test_lag_stage_waits_for_a_slow_pulldown():
+    staging = engine(pulldown_rate=0.1, stage_delay=5)
+    assert switched(staging.decide(5.0, 2.0, START)) == [("c1", True, "histéresis")]
+    # Antes de stage_delay no se añade otra etapa
+    assert staging.decide(5.0, 2.0, START + timedelta(minutes=4)) == []
+    # Bajando 0.25 °C/min no hace falta otra etapa
+    assert staging.decide(3.5, 2.0, START + timedelta(minutes=6)) == []
+    # Estancada: 1.5 °C en 30 min es menos de 0.1 °C/min
+    assert switched(staging.decide(3.5, 2.0, START + timedelta(minutes=30))) == [("c2", True, "escalonamiento")]
+
+
+def test_without_pulldown_rate_all_stages_start_together():
+    staging = engine()
+    assert [actor for actor, _, _ in switched(staging.decide(5.0, 2.0, START))] == ["c1", "c2", "c3"]
+
+
+def test_min_off_and_max_run():
+    stage = CompressorStage("c1", "COMP1", min_off=3, max_run=10)
+    staging = StagingEngine([stage])
+    staging.decide(5.0, 2.0, START)
+    changes = staging.decide(5.0, 2.0, START + timedelta(minutes=10))
+    assert switched(changes) == [("c1", False, "tiempo máximo")]
+    assert staging.decide(5.0, 2.0, START + timedelta(minutes=12)) == []
+    assert staging.next_deadline(START + timedelta(minutes=12)) == START + timedelta(minutes=13)
+    assert switched(staging.decide(5.0, 2.0, START + timedelta(minutes=13))) == [("c1", True, "histéresis")]
@@ -0,0 +1,78 @@
+"""Agregación incremental de objetivos de varios fermentadores."""
+import random
+
+import pytest
+
+from simulation import cbpi_stub
+
+cbpi_stub.install()
+
+from cbpi4_GlycolChillerWithDependantTargetTemperature.targets import TargetAggregator, parse_fermenter_list  # noqa: E402
+
+
+def test_parse_fermenter_list():
+    assert parse_fermenter_list(" f1:2, f2 ;f3:0.5,") == [("f1", 2.0), ("f2", 1.0), ("f3", 0.5)]
+    assert parse_fermenter_list(None) == []
+
+
+def test_min_follows_updates_and_removals():
+    aggregator = TargetAggregator("Min")
+    aggregator.update("f1", 12)
+    aggregator.update("f2", 8)
+    assert aggregator.value == 8
+    aggregator.update("f2", 15)
+    assert aggregator.value == 12
+    aggregator.update("f1", None)
+    assert aggregator.value == 15
+    aggregator.remove("f2")
+    assert aggregator.value is None
+
+
+def test_weighted_sums():
+    aggregator = TargetAggregator("Weighted", {"f1": 3.0})
+    aggregator.update("f1", 10)
+    aggregator.update("f2", 20)
+    assert aggregator.value == pytest.approx(12.5)
+    aggregator.update("f1", 14)
+    assert aggregator.value == pytest.approx(15.5)
+    aggregator.remove("f1")
+    assert aggregator.value == pytest.approx(20)
+
+
+def test_demand_picks_the_warmest_fermenter():
+    aggregator = TargetAggregator("Demand")
+    aggregator.update("f1", 10, temp=10.5)
+    aggregator.update("f2", 18, temp=20.0)
+    assert aggregator.value == 18
+    aggregator.update("f2", 18, temp=18.0)
+    assert aggregator.value == 10
+
+
+@pytest.mark.parametrize("policy", ["Min", "Weighted", "Demand"])
+def test_matches_a_full_recomputation(policy):
+    rng = random.Random(policy)
+    weights = {f"f{i}": rng.uniform(0.5, 2) for i in range(20)}
+    aggregator = TargetAggregator(policy, weights)
+    entries = {}
+    for _ in range(5000):
+        fermenter = rng.choice(list(weights))
+        if rng.random() < 0.1:
+            aggregator.remove(fermenter)
+            entries.pop(fermenter, None)
+        else:
+            target, temp = rng.randint(0, 20), rng.uniform(0, 25)
+            aggregator.update(fermenter, target, temp)
+            entries[fermenter] = (target, temp)
+
+        if not entries:
+            expected = None
+        elif policy == "Min":
+            expected = min(target for target, _ in entries.values())
+        elif policy == "Weighted":
+            expected = (sum(weights[f] * t for f, (t, _) in entries.items())
+                        / sum(weights[f] for f in entries))
+        else:
+            expected = min(entries.values(), key=lambda e: (-(e[1] - e[0]), e[0]))[0]
+        assert aggregator.value == pytest.approx(expected)
+    # Los montículos no crecen sin límite con el borrado perezoso
+    assert len(aggregator.heap) <= 2 * len(aggregator.entries) + 17
@@ -0,0 +1,104 @@
+"""Anillo de telemetría en fichero proyectado en memoria."""
+import json
+import math
+
+import pytest
+
+from simulation import cbpi_stub
+
+cbpi_stub.install()
+
+from cbpi4_GlycolChillerWithDependantTargetTemperature.telemetry import TelemetryRing  # noqa: E402
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "telemetry.bin")
+
+
+def fill(ring, times, temp=lambda t: 2.0, bits=0):
+    for t in times:
+        ring.append(t, temp(t), 1.0, 10.0, bits)
+
+
+def test_missing_readings_are_skipped_in_the_mean(path):
+    ring = TelemetryRing(path, 100)
+    fill(ring, range(4), temp=lambda t: math.nan if t % 2 else 3.0)
+    fill(ring, range(4, 8), temp=lambda t: math.nan)
+    rows = ring.query(points=2)
+    assert [row["chiller_temp"] for row in rows] == [3.0, None]
+    assert rows[1]["chiller_target"] == 1.0
+    # El resultado es JSON estricto
+    json.dumps(rows, allow_nan=False)
+    ring.close()
+
+
+def test_wraparound_keeps_the_newest_records(path):
+    ring = TelemetryRing(path, 10)
+    fill(ring, range(25))
+    rows = ring.query(points=100)
+    assert [row["time"] for row in rows] == list(range(15, 25))
+    ring.close()
+
+
+def test_reopening_continues_where_it_left_off(path):
+    ring = TelemetryRing(path, 10)
+    fill(ring, range(13))
+    ring.close()
+
+    ring = TelemetryRing(path, 10)
+    assert (ring.count, ring.last_time) == (10, 12)
+    fill(ring, range(13, 15))
+    assert [row["time"] for row in ring.query()] == list(range(5, 15))
+    ring.close()
+
+    # Con otra capacidad el fichero se recrea
+    ring = TelemetryRing(path, 20)
+    assert ring.count == 0 and ring.query() == []
+    ring.close()
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (None, None, list(range(100, 140))),
+    (110, 119, list(range(110, 120))),
+    (109.5, 110.5, [110]),
+    (None, 100, [100]),
+    (139, None, [139]),
+    (200, None, []),
+    (120, 110, []),
+])
+def test_range_queries_bisect_across_the_wrap(path, start, end, expected):
+    ring = TelemetryRing(path, 40)
+    # El anillo da la vuelta: el registro más antiguo no está en la posición 0
+    fill(ring, range(75, 140))
+    assert [row["time"] for row in ring.query(start, end)] == expected
+    ring.close()
+
+
+def test_points_reduce_by_averaging_groups(path):
+    ring = TelemetryRing(path, 100)
+    fill(ring, range(10), bits=1)
+    fill(ring, range(10, 20))
+    rows = ring.query(points=2)
+    assert [row["time"] for row in rows] == [4.5, 14.5]
+    assert [row["stages"][0] for row in rows] == [1.0, 0.0]
+    ring.close()
+
+
+def test_clock_stepping_back_keeps_times_sorted(path):
+    ring = TelemetryRing(path, 100)
+    fill(ring, [100, 101, 102, 50, 51, 103, 104])
+    times = [row["time"] for row in ring.query(points=100)]
+    assert times == sorted(times) == [100, 101, 102, 102, 102, 103, 104]
+    assert [row["time"] for row in ring.query(102, 102)] == [102, 102, 102]
+    ring.close()
+
+
+def test_invalid_capacity_and_query_after_close(path):
+    with pytest.raises(ValueError):
+        TelemetryRing(path, 0.5)
+    ring = TelemetryRing(path, 10)
+    fill(ring, range(5))
+    ring.close()
+    assert ring.query() == []
+    ring.flush()
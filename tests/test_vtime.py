@@ -0,0 +1,40 @@
+"""Bucle de tiempo virtual de la simulación."""
+import asyncio
+
+import pytest
+
+from simulation.vtime import VirtualTimeLoop
+
+
+def run(coroutine):
+    loop = VirtualTimeLoop()
+    try:
+        return loop.run_until_complete(coroutine(loop))
+    finally:
+        loop.close()
+
+
+def test_sleep_advances_virtual_time_only():
+    async def scenario(loop):
+        start = loop.time()
+        await asyncio.sleep(3600)
+        return loop.time() - start
+
+    assert run(scenario) == 3600
+
+
+def test_default_executor_runs_inline():
+    async def scenario(loop):
+        start = loop.time()
+        result = await loop.run_in_executor(None, sum, [1, 2, 3])
+        return result, loop.time() - start
+
+    assert run(scenario) == (6, 0)
+
+
+def test_executor_errors_propagate():
+    async def scenario(loop):
+        await loop.run_in_executor(None, int, "x")
+
+    with pytest.raises(ValueError):
+        run(scenario)